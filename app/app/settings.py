@@ -85,16 +85,68 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_POOL=1 shares a pool of connections between the threads of each
+# worker, see core.backends.pooled. Otherwise connections are kept open
+# for DB_CONN_MAX_AGE seconds, 0 closes them after every request.
+DB_POOL = bool(int(os.environ.get('DB_POOL', 0)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.backends.pooled' if DB_POOL
+            else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Pooled connections go back to the pool after each request.
+        'CONN_MAX_AGE': (
+            0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        },
     }
 }
 
+# Read replicas, as comma separated hosts sharing the primary's other
+# settings. Safe requests to the project and user views read from them,
+# see core.routers. Tests use the primary through TEST MIRROR.
+DB_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1,
+):
+    DB_REPLICAS.append(f'replica{index}')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Seconds users read from the primary after writing, to see their writes.
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+
+# Shared cache, e.g. django.core.cache.backends.memcached.PyMemcacheCache
+# or django.core.cache.backends.redis.RedisCache with its client library
+# installed. The default local memory cache is not shared by processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Cache alias holding the throttle counters, see core.throttling.
+THROTTLE_CACHE = os.environ.get('THROTTLE_CACHE', 'default')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -147,6 +199,24 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of the app, 1 behind the bundled nginx. Throttles
+    # identify clients by the address the outermost of them saw, client
+    # supplied X-Forwarded-For entries before it are ignored.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Rates of core.throttling, keyed by '<view scope>:<ip|user|endpoint>'.
+    # Override with THROTTLE_RATES, e.g. 'token:ip=5/min,write:user=60/min'.
+    'DEFAULT_THROTTLE_RATES': {
+        'token:ip': '30/min',
+        'token:endpoint': '600/min',
+        'register:ip': '30/hour',
+        'register:endpoint': '300/min',
+        'write:user': '1000/min',
+        **dict(
+            item.split('=', 1)
+            for item in os.environ.get('THROTTLE_RATES', '').split(',')
+            if item
+        ),
+    },
 }
 
 SPECTACULAR_SETTINGS = {
@@ -155,3 +225,57 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Projects API',
     'VERSION': '0.1.0'
 }
+
+# Rendered schemas served by core.schema.CachedSchemaView, written by the
+# cache_schema command. They are keyed by APP_VERSION, e.g. the commit
+# of the image, or else by a hash of the source files.
+SCHEMA_CACHE_DIR = os.environ.get('SCHEMA_CACHE_DIR', '/vol/web/schema')
+APP_VERSION = os.environ.get('APP_VERSION', '')
+
+# Serve the hot GET endpoints from async views, see core.async_views.
+# Enable when running under ASGI, SERVER_MODE=asgi in scripts/run.sh.
+ASYNC_VIEWS = bool(int(os.environ.get('ASYNC_VIEWS', 0)))
+
+# Build project lists from values() rows instead of ProjectSerializer.
+PROJECT_LIST_FAST_PATH = bool(
+    int(os.environ.get('PROJECT_LIST_FAST_PATH', 0))
+)
+
+# Resized copies generated for each uploaded project image. ``size`` is
+# the bounding box, the aspect ratio is kept.
+PROJECT_IMAGE_DERIVATIVES = {
+    'thumbnail': {'size': (160, 160), 'format': 'JPEG', 'quality': 80},
+    'medium': {'size': (800, 800), 'format': 'JPEG', 'quality': 85},
+    'webp': {'size': (1600, 1600), 'format': 'WEBP', 'quality': 80},
+}
+# Generate derivatives with a background job instead of after the upload.
+PROJECT_IMAGE_DERIVATIVES_ASYNC = bool(
+    int(os.environ.get('PROJECT_IMAGE_DERIVATIVES_ASYNC', 1))
+)
+
+# Database job queue, see core.jobs. Times are in seconds.
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 2))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+JOB_BACKOFF_BASE = float(os.environ.get('JOB_BACKOFF_BASE', 5))
+JOB_BACKOFF_MAX = float(os.environ.get('JOB_BACKOFF_MAX', 3600))
+# Running jobs without a heartbeat for this long are assumed lost with
+# their worker. Workers send heartbeats every JOB_HEARTBEAT_INTERVAL.
+JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', 600))
+JOB_HEARTBEAT_INTERVAL = float(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30))
+# Succeeded jobs are deleted after this long.
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 7 * 24 * 3600))
+
+# Running imports without a committed batch for this long are assumed
+# lost with their process and may be resumed, see project.importers.
+IMPORT_STALE_TIMEOUT = int(os.environ.get('IMPORT_STALE_TIMEOUT', 600))
+
+# Token lookups cached by core.authentication. The local tier is per
+# process, so a deleted token may work there for up to its TTL.
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 300))
+AUTH_TOKEN_LOCAL_CACHE_TTL = float(
+    os.environ.get('AUTH_TOKEN_LOCAL_CACHE_TTL', 5)
+)
+AUTH_TOKEN_LOCAL_CACHE_SIZE = int(
+    os.environ.get('AUTH_TOKEN_LOCAL_CACHE_SIZE', 10000)
+)
@@ -13,23 +13,27 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularSwaggerView
 
 from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
-from core import views as core_views
+from core import async_views, views as core_views
+from core.schema import CachedSchemaView
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/health-check/', core_views.health_check, name='health-check'),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path(
+        'api/health-check/',
+        async_views.health_check if settings.ASYNC_VIEWS
+        else core_views.health_check,
+        name='health-check',
+    ),
+    path('api/db-stats/', core_views.db_stats, name='db-stats'),
+    path('api/schema/', CachedSchemaView.as_view(), name='api-schema'),
     path(
         'api/docs/',
         SpectacularSwaggerView.as_view(url_name='api-schema'),
@@ -0,0 +1,95 @@
+"""
+Async views for serving the API under ASGI.
+
+DRF views are sync only. Under ASGI Django runs every sync view on one
+thread per process, so a slow request holds up all the others. The
+views here serve the hot GET endpoints from coroutines instead. Only
+their database queries go through that thread, via the async ORM.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, JsonResponse
+
+
+async def health_check(request):
+    """Returns successful response."""
+    return JsonResponse({'healthy': True})
+
+
+async def authenticate(view, request):
+    """Set the user of a DRF request with the view's authenticators.
+
+    Authenticators with an ``aauthenticate`` method are awaited, others
+    run their ``authenticate`` in the database thread.
+    """
+    for authenticator in view.get_authenticators():
+        aauthenticate = getattr(authenticator, 'aauthenticate', None)
+        if aauthenticate is None:
+            aauthenticate = sync_to_async(authenticator.authenticate)
+        credentials = await aauthenticate(request)
+        if credentials is not None:
+            request.user, request.auth = credentials
+            return
+    request.user, request.auth = AnonymousUser(), None
+
+
+async def paginate(view, queryset):
+    """Return the page of a queryset, or None when not paginated.
+
+    DRF paginators evaluate the queryset themselves, so paginating runs
+    in the database thread.
+    """
+    if view.paginator is None:
+        return None
+    return await sync_to_async(view.paginate_queryset)(queryset)
+
+
+def as_async_view(viewset, actions, handler):
+    """Return a view serving GET requests of a route with ``handler``.
+
+    ``handler`` is a coroutine function called like a viewset action,
+    with the viewset instance in place of ``self``. Authentication,
+    permissions, throttles, error handling and content negotiation are
+    those of the viewset. Other methods are dispatched to the regular
+    sync viewset view.
+    """
+    sync_view = viewset.as_view(actions)
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        self = viewset()
+        self.action_map = actions
+        self.args, self.kwargs = args, kwargs
+        self.request = request = self.initialize_request(
+            request, *args, **kwargs
+        )
+        self.headers = self.default_response_headers
+        try:
+            await authenticate(self, request)
+            # Permission checks and throttles may use the cache or the
+            # database, keep them off the event loop.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(self, request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        response = self.finalize_response(request, response, *args,
+                                          **kwargs)
+
+        if not hasattr(response, 'render'):
+            return response
+        # Render here, Django renders deferred responses in the sync
+        # thread.
+        response.render()
+        rendered = HttpResponse(response.content,
+                                status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+    view.csrf_exempt = True
+    view.cls = sync_view.cls
+    view.initkwargs = sync_view.initkwargs
+    view.actions = sync_view.actions
+    return view
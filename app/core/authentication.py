@@ -0,0 +1,175 @@
+"""
+Cached token authentication.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import DEFERRED
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+
+class LocalTTLCache:
+    """Thread-safe in-process LRU cache whose entries expire."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value of a live entry, or None."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove an entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+
+local_tokens = LocalTTLCache(
+    settings.AUTH_TOKEN_LOCAL_CACHE_SIZE,
+    settings.AUTH_TOKEN_LOCAL_CACHE_TTL,
+)
+
+
+# Fields of the user kept in the caches. The others, the password hash
+# above all, are deferred and loaded from the database if accessed.
+CACHED_USER_FIELDS = ('id', 'email', 'name', 'is_active', 'is_staff',
+                      'is_superuser')
+
+
+def token_cache_key(key):
+    """Return the cache key of a token, without the token itself."""
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def invalidate_token(key):
+    """Forget a cached token in this process and the shared cache.
+
+    Other processes keep their local entry for at most
+    ``AUTH_TOKEN_LOCAL_CACHE_TTL`` seconds.
+    """
+    cache_key = token_cache_key(key)
+    local_tokens.delete(cache_key)
+    cache.delete(cache_key)
+
+
+def invalidate_user(user_id):
+    """Forget the cached tokens of a user."""
+    for key in Token.objects.filter(user_id=user_id).values_list(
+        'key', flat=True,
+    ):
+        invalidate_token(key)
+
+
+def token_entry(token):
+    """Return what is cached of a token, without secrets."""
+    return {
+        'created': token.created,
+        'user': {name: getattr(token.user, name)
+                 for name in CACHED_USER_FIELDS},
+    }
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches tokens with their user.
+
+    Lookups go through a short-lived per-process LRU cache, then the
+    shared Django cache, and only then the database. Tokens are
+    invalidated when they are deleted or their user changes, see
+    ``core.signals``.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        entry = local_tokens.get(cache_key)
+        if entry is None:
+            entry = cache.get(cache_key)
+            if entry is None:
+                _, token = super().authenticate_credentials(key)
+                entry = token_entry(token)
+                cache.set(cache_key, entry, settings.AUTH_TOKEN_CACHE_TTL)
+            local_tokens.set(cache_key, entry)
+
+        return self._credentials(key, entry)
+
+    async def aauthenticate(self, request):
+        """Same as ``authenticate`` using the async cache and ORM."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        cache_key = token_cache_key(key)
+        entry = local_tokens.get(cache_key)
+        if entry is None:
+            entry = await cache.aget(cache_key)
+            if entry is None:
+                try:
+                    token = await Token.objects.select_related(
+                        'user',
+                    ).aget(key=key)
+                except Token.DoesNotExist:
+                    raise exceptions.AuthenticationFailed('Invalid token.')
+                entry = token_entry(token)
+                await cache.aset(cache_key, entry,
+                                 settings.AUTH_TOKEN_CACHE_TTL)
+            local_tokens.set(cache_key, entry)
+
+        return self._credentials(key, entry)
+
+    def _credentials(self, key, entry):
+        """Return the user and token of a cached entry if it is active."""
+        if not entry['user']['is_active']:
+            raise exceptions.AuthenticationFailed(
+                'User inactive or deleted.'
+            )
+
+        fields = get_user_model()._meta.concrete_fields
+        user = get_user_model().from_db(
+            'default',
+            [field.attname for field in fields],
+            [entry['user'].get(field.attname, DEFERRED) for field in fields],
+        )
+        token = Token(key=key, user=user, created=entry['created'])
+
+        return (user, token)
@@ -0,0 +1,61 @@
+"""
+PostgreSQL backend keeping connections in a per-process pool.
+
+Closing a connection, which Django does at the end of every request
+when ``CONN_MAX_AGE`` is 0, hands it back to the pool instead of
+disconnecting. Threads and async requests of a worker then share a few
+open connections. Pool options come from the ``POOL`` dictionary of the
+database settings: ``MAX_SIZE`` connections and a ``TIMEOUT`` in
+seconds to wait for one.
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL connections taken from a pool."""
+    pooled = True
+
+    def get_pool(self):
+        """Return the pool of this database."""
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.get_pool().acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params,
+                ),
+                self._is_alive,
+            )
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _is_alive(self, connection):
+        """Return whether a pooled connection can be reused."""
+        if connection.closed:
+            return False
+        if not self.settings_dict['CONN_HEALTH_CHECKS']:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        discard = bool(connection.closed)
+        if not discard and connection.get_transaction_status() != (
+            extensions.TRANSACTION_STATUS_IDLE
+        ):
+            try:
+                connection.rollback()
+            except self.Database.Error:
+                discard = True
+        self.get_pool().release(connection, discard=discard)
@@ -0,0 +1,181 @@
+"""
+Database connection pooling and statistics.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+from django.db import connections
+
+
+class PoolTimeout(Exception):
+    """No connection was released within the pool timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of open database connections.
+
+    ``acquire`` hands out the most recently released connection, opens a
+    new one while fewer than ``max_size`` exist, or else waits up to
+    ``timeout`` seconds for one to be released.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = Counter()
+        self._wait_max = 0.0
+
+    def acquire(self, connect, check=None):
+        """Return a connection, opened with ``connect`` if needed.
+
+        Idle connections for which ``check`` returns False are closed
+        and replaced.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No database connection was released within '
+                        f'{self.timeout} seconds.'
+                    )
+                self._condition.wait(remaining)
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                self._size += 1
+            waited = time.monotonic() - start
+            self._stats['acquired'] += 1
+            self._stats['wait_seconds'] += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        if connection is not None:
+            if check is None or check(connection):
+                with self._condition:
+                    self._stats['reused'] += 1
+                return connection
+            # Keep the slot and replace the broken connection.
+            with self._condition:
+                self._stats['discarded'] += 1
+            self._close(connection)
+
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._stats['created'] += 1
+        record('connects')
+        return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or close it if discarded."""
+        with self._condition:
+            if discard:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+        if discard:
+            self._close(connection)
+
+    def _close(self, connection):
+        """Close a connection, ignoring errors of broken ones."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close the idle connections."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Return the size and usage counters of the pool."""
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **{name: self._stats[name] for name in (
+                    'acquired', 'created', 'reused', 'discarded', 'timeouts',
+                )},
+                'wait_seconds_total': round(self._stats['wait_seconds'], 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """Return the pool of a database alias, creating it on first use."""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+            )
+        return _pools[alias]
+
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def record(name):
+    """Count a request or connection event of this process.
+
+    ``connects`` counts new physical connections, ``checkouts`` every
+    connection Django opens, including ones handed out by a pool.
+    """
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def connection_stats():
+    """Return the connection reuse statistics of this process."""
+    with _counters_lock:
+        requests, connects, checkouts = (
+            _counters['requests'], _counters['connects'],
+            _counters['checkouts'],
+        )
+    databases = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        pool = _pools.get(alias)
+        databases[alias] = {
+            'engine': settings_dict['ENGINE'],
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE', 0),
+            'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS',
+                                                    False),
+            'pool': pool.stats() if pool else None,
+        }
+
+    return {
+        'pid': os.getpid(),
+        'requests': requests,
+        'connects': connects,
+        'checkouts': checkouts,
+        'connects_per_request': round(connects / requests, 4)
+        if requests else None,
+        'databases': databases,
+    }
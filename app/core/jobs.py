@@ -0,0 +1,210 @@
+"""
+Background jobs stored in the database.
+
+Handlers are registered by job type with ``register`` and run by the
+``run_worker`` command. A job is a row of the ``Job`` table, so it is
+queued atomically with the transaction that enqueues it.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from core.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def register(job_type):
+    """Register the decorated function as the handler of a job type.
+
+    The handler is called with the job payload as keyword arguments. A
+    raised exception fails the attempt and the job is retried.
+    """
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+
+    return decorator
+
+
+def enqueue(job_type, payload=None, run_at=None, max_attempts=None):
+    """Queue a job, visible to workers once the transaction commits."""
+    if job_type not in _handlers:
+        raise ValueError(f'Unknown job type: {job_type}')
+
+    return Job.objects.create(
+        job_type=job_type,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim(worker_id, job_types=None, limit=1):
+    """Lock and return due jobs for a worker.
+
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` lets concurrent workers claim
+    different jobs without waiting on each other's locks.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.STATUS_QUEUED,
+            run_at__lte=now,
+        )
+        if job_types:
+            queryset = queryset.filter(job_type__in=job_types)
+        jobs = list(queryset.order_by('run_at', 'id')[:limit])
+        if not jobs:
+            return []
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+    for job in jobs:
+        job.status = Job.STATUS_RUNNING
+        job.locked_by = worker_id
+        job.started_at = now
+        job.heartbeat_at = now
+        job.attempts += 1
+    return jobs
+
+
+def backoff(attempts):
+    """Return the delay in seconds before retrying a failed attempt.
+
+    The delay doubles with each attempt up to ``JOB_BACKOFF_MAX``, with
+    jitter so failed jobs do not all retry at once.
+    """
+    delay = min(
+        settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1),
+        settings.JOB_BACKOFF_MAX,
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def run(job):
+    """Run a claimed job and record the outcome.
+
+    Returns whether the job succeeded. Failed attempts are queued again
+    after a backoff until ``max_attempts`` is reached.
+    """
+    owned = Job.objects.filter(
+        pk=job.pk,
+        status=Job.STATUS_RUNNING,
+        locked_by=job.locked_by,
+    )
+    handler = _handlers.get(job.job_type)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler for job type {job.job_type}')
+        handler(**job.payload)
+    except Exception:
+        now = timezone.now()
+        if handler is not None and job.attempts < job.max_attempts:
+            changes = {
+                'status': Job.STATUS_QUEUED,
+                'run_at': now + timedelta(seconds=backoff(job.attempts)),
+            }
+        else:
+            changes = {'status': Job.STATUS_FAILED, 'finished_at': now}
+        logger.exception('Job %s failed on attempt %s', job, job.attempts)
+        owned.update(locked_by='', last_error=traceback.format_exc(),
+                     **changes)
+        job.status = changes['status']
+        return False
+
+    owned.update(
+        status=Job.STATUS_SUCCEEDED,
+        locked_by='',
+        finished_at=timezone.now(),
+    )
+    job.status = Job.STATUS_SUCCEEDED
+    return True
+
+
+def heartbeat(job_ids):
+    """Mark running jobs as alive, returning the number updated.
+
+    Workers call this periodically for the jobs they run, so long jobs
+    are not taken for lost ones by ``recover_stale``.
+    """
+    if not job_ids:
+        return 0
+    return Job.objects.filter(
+        pk__in=job_ids,
+        status=Job.STATUS_RUNNING,
+    ).update(heartbeat_at=timezone.now())
+
+
+def recover_stale(timeout=None):
+    """Queue again the jobs whose worker stopped while running them.
+
+    A job is stale without a heartbeat for ``JOB_STALE_TIMEOUT`` seconds.
+    Returns the number of recovered jobs. Jobs out of attempts fail.
+    """
+    timeout = settings.JOB_STALE_TIMEOUT if timeout is None else timeout
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff)
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=Job.STATUS_RUNNING,
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED,
+        locked_by='',
+        finished_at=now,
+        last_error='Worker lost while running the job.',
+    )
+    return stale.update(status=Job.STATUS_QUEUED, locked_by='', run_at=now)
+
+
+def prune(retention=None):
+    """Delete succeeded jobs older than the retention period."""
+    retention = settings.JOB_RETENTION if retention is None else retention
+    deleted, _ = Job.objects.filter(
+        status=Job.STATUS_SUCCEEDED,
+        finished_at__lt=timezone.now() - timedelta(seconds=retention),
+    ).delete()
+    return deleted
+
+
+def job_metrics(since):
+    """Return queue depth and throughput per job type.
+
+    Throughput counts the jobs finished since the given time, in jobs
+    per minute.
+    """
+    minutes = max((timezone.now() - since).total_seconds() / 60, 1 / 60)
+    finished = Q(finished_at__gte=since)
+    rows = Job.objects.values('job_type').annotate(
+        queued=Count('id', filter=Q(status=Job.STATUS_QUEUED)),
+        running=Count('id', filter=Q(status=Job.STATUS_RUNNING)),
+        succeeded=Count('id', filter=finished & Q(
+            status=Job.STATUS_SUCCEEDED,
+        )),
+        failed=Count('id', filter=finished & Q(status=Job.STATUS_FAILED)),
+        retrying=Count('id', filter=Q(
+            status=Job.STATUS_QUEUED,
+            attempts__gt=0,
+        )),
+    ).order_by('job_type')
+
+    return [
+        {**row, 'per_minute': round(row['succeeded'] / minutes, 2)}
+        for row in rows
+    ]
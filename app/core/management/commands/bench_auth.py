@@ -0,0 +1,60 @@
+"""
+Django command to measure the latency of token authentication.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.authentication import CachedTokenAuthentication, local_tokens
+
+
+class Command(BaseCommand):
+    """Compare plain and cached token authentication."""
+    help = (
+        'Authenticate a throwaway token repeatedly and report the time '
+        'and queries per request for each authentication tier.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def _measure(self, label, authentication, request, count, before=None):
+        """Authenticate ``count`` times and print the average cost."""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                if before:
+                    before()
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{label:<24} {elapsed / count * 1e6:8.1f} us/request '
+            f'{len(queries) / count:6.2f} queries/request'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        count = options['requests']
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                'bench-auth@example.com', 'unused-password',
+            )
+            token = Token.objects.create(user=user)
+            request = RequestFactory().get(
+                '/', HTTP_AUTHORIZATION=f'Token {token.key}',
+            )
+            cached = CachedTokenAuthentication()
+
+            self._measure('database', TokenAuthentication(), request, count)
+            self._measure('shared cache', cached, request, count,
+                          before=local_tokens.clear)
+            self._measure('local cache', cached, request, count)
+
+            token.delete()
+            transaction.set_rollback(True)
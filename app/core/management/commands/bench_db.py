@@ -0,0 +1,55 @@
+"""
+Django command to measure the cost of database connection handling.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from core.db import connection_stats
+
+
+class Command(BaseCommand):
+    """Compare requests per second with and without connection reuse."""
+    help = (
+        'Simulate requests running one query each, sending the request '
+        'signals Django uses to close connections, first with '
+        'CONN_MAX_AGE=0 and then with persistent connections. With the '
+        'pooled backend both reuse pooled connections.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def _measure(self, count):
+        """Return the requests per second of ``count`` requests."""
+        start = time.perf_counter()
+        for _ in range(count):
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=self.__class__)
+        return count / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        count = options['requests']
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        self.stdout.write(f'Engine: {connection.settings_dict["ENGINE"]}')
+        try:
+            for label, age in (('connection per request', 0),
+                               ('persistent connection', 60)):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = age
+                self._measure(min(count, 10))
+                self.stdout.write(
+                    f'{label:<24} {self._measure(count):8.1f} requests/s'
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+
+        pool = connection_stats()['databases'][connection.alias]['pool']
+        if pool:
+            self.stdout.write(f'Pool: {pool}')
@@ -0,0 +1,51 @@
+"""
+Django command to measure the overhead of request throttling.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.throttling import IPThrottle
+
+
+class HistoryThrottle(SimpleRateThrottle):
+    """DRF's timestamp history throttle, for comparison."""
+    rate = '1000000/hour'
+
+    def get_cache_key(self, request, view):
+        return f'bench-throttle-history:{self.get_ident(request)}'
+
+
+class BenchView:
+    """Stand-in view giving the throttles a scope."""
+    throttle_scope = 'bench'
+
+
+class Command(BaseCommand):
+    """Compare the sliding window and history throttles."""
+    help = (
+        'Run allowed requests through each throttle and report the time '
+        'per request. The history throttle slows down as requests pile up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        count = options['requests']
+        request = RequestFactory().get('/', REMOTE_ADDR='192.0.2.1')
+        sliding = IPThrottle()
+        sliding.get_rate = lambda view: '1000000/hour'
+
+        for label, throttle in (('sliding window', sliding),
+                                ('history', HistoryThrottle())):
+            start = time.perf_counter()
+            for _ in range(count):
+                throttle.allow_request(request, BenchView)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{label:<16} {elapsed / count * 1e6:8.1f} us/request'
+            )
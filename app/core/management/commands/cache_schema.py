@@ -0,0 +1,36 @@
+"""
+Django command to pre-generate the OpenAPI schema.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.schema import code_version, read_schema, render_schema, write_schema
+
+
+class Command(BaseCommand):
+    """Write the schema served at /api/schema/ for this code version."""
+    help = (
+        'Generate and cache the OpenAPI schema, unless it is already '
+        'cached for the current code version.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Generate the schema even if it is cached.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        version = code_version()
+        if not options['force'] and read_schema() is not None:
+            self.stdout.write(f'Schema {version} is cached.')
+            return
+
+        start = time.perf_counter()
+        write_schema(render_schema())
+        self.stdout.write(self.style.SUCCESS(
+            f'Cached schema {version} in '
+            f'{time.perf_counter() - start:.2f}s.'
+        ))
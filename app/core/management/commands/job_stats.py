@@ -0,0 +1,35 @@
+"""
+Django command to show background job metrics.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.jobs import job_metrics
+
+
+class Command(BaseCommand):
+    """Print the queue depth and throughput per job type."""
+    help = 'Show queued, running and finished jobs per job type.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=60,
+            help='Count the jobs finished in the last minutes.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        since = timezone.now() - timedelta(minutes=options['minutes'])
+        self.stdout.write(
+            f'{"job type":<40} {"queued":>8} {"running":>8} '
+            f'{"retrying":>8} {"done":>8} {"failed":>8} {"per min":>8}'
+        )
+        for row in job_metrics(since):
+            self.stdout.write(
+                f'{row["job_type"]:<40} {row["queued"]:>8} '
+                f'{row["running"]:>8} {row["retrying"]:>8} '
+                f'{row["succeeded"]:>8} {row["failed"]:>8} '
+                f'{row["per_minute"]:>8}'
+            )
@@ -0,0 +1,120 @@
+"""
+Django command to prepare a container before the server starts.
+"""
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+STATIC_IGNORE_PATTERNS = ['CVS', '.*', '*~']
+STATIC_HASH_FILE = '.collectstatic.sha256'
+
+
+def static_hash():
+    """Return a hash of the static files collectstatic would copy."""
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(STATIC_IGNORE_PATTERNS):
+            # The first finder to list a path wins, as in collectstatic.
+            files.setdefault(path, storage)
+
+    backend = settings.STORAGES['staticfiles']['BACKEND']
+    digest = hashlib.sha256(backend.encode())
+    for path in sorted(files):
+        digest.update(f'\0{path}\0'.encode())
+        with files[path].open(path) as file:
+            for chunk in file.chunks():
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def static_hash_path():
+    """Return the file the hash of the collected files is kept in."""
+    return os.path.join(settings.STATIC_ROOT, STATIC_HASH_FILE)
+
+
+def collected_static_hash():
+    """Return the hash of the static files collected last, if any."""
+    try:
+        with open(static_hash_path()) as file:
+            return file.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    """Return the migrations not yet applied to a database."""
+    executor = MigrationExecutor(connections[database])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+class Command(BaseCommand):
+    """Wait for the database, collect static files, cache and migrate."""
+    help = (
+        'Run the start up steps of the server in one process, skipping '
+        'collectstatic when the static files did not change and migrate '
+        'when there is nothing to apply. Logs the time of each step.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--db-timeout', type=float, default=60,
+            help='Seconds to wait for the database.',
+        )
+
+    @contextmanager
+    def _phase(self, name):
+        """Log how long the steps of a phase take."""
+        start = time.perf_counter()
+        yield
+        self.stdout.write(
+            f'[start] {name}: {time.perf_counter() - start:.2f}s'
+        )
+
+    def collect_static(self):
+        """Run collectstatic unless the collected files are current."""
+        current = static_hash()
+        if collected_static_hash() == current:
+            self.stdout.write('Static files unchanged, skipping.')
+            return
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(static_hash_path(), 'w') as file:
+            file.write(current)
+        self.stdout.write('Static files collected.')
+
+    def migrate(self):
+        """Run migrate if migrations are pending."""
+        plan = pending_migrations()
+        if not plan:
+            self.stdout.write('No migrations to apply, skipping.')
+            return
+
+        self.stdout.write(f'Applying {len(plan)} migrations.')
+        call_command('migrate', interactive=False, stdout=self.stdout)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.perf_counter()
+        with self._phase('wait_for_db'):
+            call_command('wait_for_db', timeout=options['db_timeout'],
+                         stdout=self.stdout)
+        with self._phase('collectstatic'):
+            self.collect_static()
+        with self._phase('cache_schema'):
+            call_command('cache_schema', stdout=self.stdout)
+        with self._phase('migrate'):
+            self.migrate()
+
+        self.stdout.write(
+            f'[start] total: {time.perf_counter() - start:.2f}s'
+        )
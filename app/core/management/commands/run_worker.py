@@ -0,0 +1,181 @@
+"""
+Django command to run background jobs from the database queue.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from core import jobs
+
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    """Claim and run queued jobs until stopped."""
+    help = (
+        'Run background jobs. Each thread claims jobs with SELECT ... FOR '
+        'UPDATE SKIP LOCKED, so any number of workers can run at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help='Number of jobs run at the same time.',
+        )
+        parser.add_argument(
+            '--job-type', action='append', dest='job_types',
+            help='Only run jobs of this type, may be repeated.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait when the queue is empty.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once no job is due instead of waiting for more.',
+        )
+
+    def _work(self, index, options):
+        """Run jobs in one thread until stopped or, in burst mode, idle."""
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        last_maintenance = None
+        while not self.stop.is_set():
+            try:
+                if index == 0 and (
+                    last_maintenance is None
+                    or time.monotonic() - last_maintenance
+                    > MAINTENANCE_INTERVAL
+                ):
+                    jobs.recover_stale()
+                    jobs.prune()
+                    last_maintenance = time.monotonic()
+
+                claimed = jobs.claim(worker_id, options['job_types'])
+            except DatabaseError:
+                logger.exception('Claiming jobs failed, retrying')
+                close_old_connections()
+                self.stop.wait(options['poll_interval'])
+                continue
+
+            if not claimed:
+                if options['burst']:
+                    break
+                self.stop.wait(options['poll_interval'])
+                continue
+
+            for job in claimed:
+                with self.lock:
+                    self.running.add(job.pk)
+                start = time.perf_counter()
+                try:
+                    succeeded = jobs.run(job)
+                except DatabaseError:
+                    # The job stays running without heartbeats and is
+                    # recovered by recover_stale.
+                    logger.exception('Recording the outcome of %s failed',
+                                     job)
+                    close_old_connections()
+                    continue
+                finally:
+                    with self.lock:
+                        self.running.discard(job.pk)
+                self._record(job.job_type, succeeded,
+                             time.perf_counter() - start)
+
+    def _heartbeat(self):
+        """Send heartbeats for the running jobs until the workers exit."""
+        try:
+            while not self.done.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                with self.lock:
+                    job_ids = list(self.running)
+                try:
+                    jobs.heartbeat(job_ids)
+                except DatabaseError:
+                    logger.exception('Sending job heartbeats failed')
+                    close_old_connections()
+        finally:
+            connections.close_all()
+
+    def _work_in_thread(self, index, options):
+        """Run ``_work`` and close the thread's database connections."""
+        try:
+            self._work(index, options)
+        finally:
+            connections.close_all()
+
+    def _record(self, job_type, succeeded, seconds):
+        """Add a finished attempt to the statistics of this run."""
+        with self.lock:
+            stats = self.stats[job_type]
+            stats['succeeded' if succeeded else 'failed'] += 1
+            stats['seconds'] += seconds
+
+    def _report(self, elapsed):
+        """Print the throughput per job type of this run."""
+        for job_type, stats in sorted(self.stats.items()):
+            count = stats['succeeded'] + stats['failed']
+            self.stdout.write(
+                f'{job_type}: {stats["succeeded"]:.0f} succeeded, '
+                f'{stats["failed"]:.0f} failed, '
+                f'{count / elapsed if elapsed else 0:.1f} jobs/s, '
+                f'{stats["seconds"] / count:.3f}s average'
+            )
+
+    def _handle_signal(self, signum, frame):
+        """Finish the running jobs and stop."""
+        self.stdout.write('Stopping after the running jobs...')
+        self.stop.set()
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: defaultdict(float))
+        self.running = set()
+        self.done = threading.Event()
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(signum, self._handle_signal)
+
+        concurrency = max(options['concurrency'], 1)
+        self.stdout.write(f'Worker started with {concurrency} threads.')
+        start = time.perf_counter()
+        heartbeat = threading.Thread(target=self._heartbeat,
+                                     name='heartbeat')
+        heartbeat.start()
+        try:
+            if concurrency == 1:
+                self._work(0, options)
+            else:
+                threads = [
+                    threading.Thread(target=self._work_in_thread,
+                                     args=(index, options),
+                                     name=f'worker-{index}')
+                    for index in range(concurrency)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            self.done.set()
+            heartbeat.join()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+        self._report(time.perf_counter() - start)
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_data_versions(apps, schema_editor):
+    """Create a data version for every existing user."""
+    User = apps.get_model('core', 'User')
+    DataVersion = apps.get_model('core', 'DataVersion')
+    DataVersion.objects.bulk_create(
+        [DataVersion(user_id=pk) for pk in
+         User.objects.values_list('pk', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_project_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(
+            create_data_versions,
+            migrations.RunPython.noop,
+        ),
+    ]
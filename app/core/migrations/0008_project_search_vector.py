@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+FORWARD_SQL = """
+ALTER TABLE core_project ADD COLUMN search_vector tsvector;
+
+CREATE FUNCTION core_project_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english',
+                              coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english',
+                              coalesce(NEW."bodyText", '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_project_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, "bodyText" ON core_project
+    FOR EACH ROW EXECUTE FUNCTION core_project_search_vector_update();
+
+UPDATE core_project SET title = title;
+
+CREATE INDEX core_project_search_vector_gin
+    ON core_project USING gin (search_vector);
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS core_project_search_vector_trigger ON core_project;
+DROP FUNCTION IF EXISTS core_project_search_vector_update();
+ALTER TABLE core_project DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def run_on_postgresql(sql):
+    """Return a migration function executing sql on PostgreSQL only."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Add a trigger maintained full-text search vector to projects.
+
+    The column is not a model field so regular project queries do not
+    select it. It is only created on PostgreSQL, other databases fall
+    back to substring matching.
+    """
+
+    dependencies = [
+        ('core', '0007_importrun'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(REVERSE_SQL),
+        ),
+    ]
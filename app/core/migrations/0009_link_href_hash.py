@@ -0,0 +1,77 @@
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+import core.models
+
+
+def merge_into(through, field, keep, duplicates):
+    """Point the projects of duplicate rows at the kept row."""
+    rows = through.objects.filter(**{f'{field}_id__in': duplicates})
+    project_ids = set(rows.values_list('project_id', flat=True))
+    project_ids -= set(through.objects.filter(
+        **{f'{field}_id': keep}
+    ).values_list('project_id', flat=True))
+    rows.delete()
+    through.objects.bulk_create([
+        through(project_id=project_id, **{f'{field}_id': keep})
+        for project_id in project_ids
+    ])
+
+
+def merge_groups(queryset, keys, through, field):
+    """Merge the rows of queryset sharing keys into the oldest one."""
+    groups = list(queryset.values(*keys).annotate(
+        count=Count('id'),
+        keep=Min('id'),
+    ).filter(count__gt=1))
+    for group in groups:
+        duplicates = list(
+            queryset.filter(**{key: group[key] for key in keys})
+            .exclude(id=group['keep'])
+            .values_list('id', flat=True)
+        )
+        merge_into(through, field, group['keep'], duplicates)
+        queryset.model.objects.filter(id__in=duplicates).delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    """Hash link hrefs and merge duplicate tags and links per user."""
+    Project = apps.get_model('core', 'Project')
+    Tag = apps.get_model('core', 'Tag')
+    Link = apps.get_model('core', 'Link')
+
+    links = list(Link.objects.only('id', 'href'))
+    for link in links:
+        link.href_hash = core.models.hash_href(link.href)
+    Link.objects.bulk_update(links, ['href_hash'], batch_size=1000)
+
+    merge_groups(
+        Tag.objects.annotate(lower_name=Lower('name')),
+        ['user', 'lower_name'],
+        Project.tags.through,
+        'tag',
+    )
+    merge_groups(
+        Link.objects.all(),
+        ['user', 'text', 'href_hash'],
+        Project.links.through,
+        'link',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_project_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='href_hash',
+            field=core.models.HrefHashField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def search_vector_field():
+    """Return the search vector field, bound to its column name."""
+    field = django.contrib.postgres.search.SearchVectorField(null=True)
+    field.set_attributes_from_name('search_vector')
+    return field
+
+
+def add_search_vector(apps, schema_editor):
+    """Add the column migration 0008 only created on PostgreSQL."""
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.add_field(
+            apps.get_model('core', 'Project'), search_vector_field(),
+        )
+
+
+def remove_search_vector(apps, schema_editor):
+    """Drop the column again where migration 0008 does not."""
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.remove_field(
+            apps.get_model('core', 'Project'), search_vector_field(),
+        )
+
+
+class Migration(migrations.Migration):
+    """Declare the search vector and its GIN index on the model.
+
+    On PostgreSQL both exist since migration 0008, so only the state
+    changes. Other databases get the column, but no GIN index.
+    """
+
+    dependencies = [
+        ('core', '0014_job_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    add_search_vector,
+                    remove_search_vector,
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='project',
+                    name='search_vector',
+                    field=django.contrib.postgres.search.SearchVectorField(
+                        editable=False, null=True,
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name='project',
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=['search_vector'],
+                        name='core_project_search_vector_gin',
+                    ),
+                ),
+            ],
+        ),
+    ]
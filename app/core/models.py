@@ -1,11 +1,22 @@
 """
 Database models.
 """
-import uuid
+import hashlib
 import os
+from urllib.parse import urlsplit, urlunsplit
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from core.storage import (
+    content_addressed_storage,
+    file_digest,
+    sharded_name,
+)
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -14,11 +25,69 @@ from django.contrib.auth.models import (
 
 
 def project_image_file_path(instance, filename):
-    """Generate file path for new project image."""
-    ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    """Generate file path for new project image.
+
+    Images are named after the SHA-256 of their content in a sharded
+    directory tree, so identical uploads are stored once.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    return sharded_name(
+        os.path.join('uploads', 'project'),
+        file_digest(instance.image),
+        ext,
+    )
+
+
+def normalize_href(href):
+    """Return a canonical form of a URL used to detect duplicates.
+
+    Scheme and host are lowercased, default ports and trailing slashes
+    are dropped. The query and fragment are kept as they are.
+    """
+    parts = urlsplit(href.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {'http': ':80', 'https': ':443'}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+
+    return urlunsplit((
+        scheme,
+        netloc,
+        parts.path.rstrip('/'),
+        parts.query,
+        parts.fragment,
+    ))
+
+
+def hash_href(href):
+    """Return the SHA-256 hex digest of a normalized URL."""
+    return hashlib.sha256(normalize_href(href).encode()).hexdigest()
 
-    return os.path.join('uploads', 'project', filename)
+
+class HrefHashField(models.CharField):
+    """Field holding the hash of the normalized URL in another field.
+
+    The value is computed in ``pre_save`` so it is also set by
+    ``bulk_create``.
+    """
+
+    def __init__(self, *args, source='href', **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 64)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'href':
+            kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = hash_href(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
 
 
 class UserManager(BaseUserManager):
@@ -56,8 +125,25 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class ProjectManager(models.Manager):
+    """Manager for projects."""
+
+    def get_queryset(self):
+        """Leave the search vector, only used in queries, unloaded."""
+        return super().get_queryset().defer('search_vector')
+
+
 class Project(models.Model):
     """Project object."""
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -66,7 +152,34 @@ class Project(models.Model):
     bodyText = models.TextField(blank=True)
     tags = models.ManyToManyField('Tag', blank=True)
     links = models.ManyToManyField('Link', blank=True)
-    image = models.ImageField(null=True, upload_to=project_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=project_image_file_path,
+        storage=content_addressed_storage,
+    )
+    # Resized copies of the image by derivative name, with their storage
+    # path and dimensions, see ``project.images``.
+    image_derivatives = models.JSONField(default=dict, blank=True)
+    image_status = models.CharField(
+        max_length=20,
+        choices=IMAGE_STATUS_CHOICES,
+        blank=True,
+    )
+    modified_at = models.DateTimeField(auto_now=True)
+    # Weighted title and body words, maintained by a PostgreSQL trigger,
+    # see migration 0008 and ``project.filters.search_projects``. Unused
+    # and always empty on other databases.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProjectManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='core_project_search_vector_gin',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -80,6 +193,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                models.F('user'),
+                Lower('name'),
+                name='unique_tag_name_per_user',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -91,6 +213,214 @@ class Link(models.Model):
         on_delete=models.CASCADE)
     text = models.CharField(max_length=255)
     href = models.URLField()
+    href_hash = HrefHashField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'href_hash', 'text'],
+                name='unique_link_per_user',
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class DataVersionManager(models.Manager):
+    """Manager for data versions."""
+
+    def current(self, user):
+        """Return the data version of a user, creating it if needed.
+
+        The version is read from the read database, a replica inside
+        ``core.routers.replica_reads``, so it describes the rows read
+        next to it. Only missing versions are created on the primary.
+        """
+        version = self.filter(user=user).first()
+        if version is None:
+            version, created = self.get_or_create(user=user)
+
+        return version
+
+    async def acurrent(self, user):
+        """Async version of ``current``."""
+        version = await self.filter(user=user).afirst()
+        if version is None:
+            version, created = await self.aget_or_create(user=user)
+
+        return version
+
+    def bump(self, user_ids):
+        """Increment the data version of the given users."""
+        return self.filter(user_id__in=user_ids).update(
+            version=models.F('version') + 1,
+            modified_at=timezone.now(),
+        )
+
+
+class DataVersion(models.Model):
+    """Version of a user's projects, tags and links.
+
+    The version is incremented on every write so clients can cheaply
+    revalidate cached list responses.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    objects = DataVersionManager()
+
+    def __str__(self):
+        return f'{self.user_id}:{self.version}'
+
+
+class ImportRun(models.Model):
+    """Progress of a bulk import of projects from a file.
+
+    ``rows_processed`` is committed together with each batch, so a failed
+    import of the same file resumes after the last committed batch.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    source = models.CharField(max_length=255)
+    checksum = models.CharField(max_length=64)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_RUNNING,
+    )
+    rows_processed = models.PositiveBigIntegerField(default=0)
+    rows_imported = models.PositiveBigIntegerField(default=0)
+    rows_skipped = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'checksum'],
+                name='unique_import_run_per_file',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+
+class StoredFileManager(models.Manager):
+    """Manager for stored file references."""
+
+    def acquire(self, name):
+        """Add a reference to a stored file."""
+        while not self.filter(name=name).update(
+            references=models.F('references') + 1,
+        ):
+            try:
+                with transaction.atomic():
+                    self.create(name=name, references=1)
+                return
+            except IntegrityError:
+                continue
+
+    def release(self, name):
+        """Drop a reference to a stored file.
+
+        After the last reference the file and the files derived from it
+        are deleted once the transaction commits, unless it was
+        referenced again in the meantime.
+        """
+        if self.filter(name=name, references__gt=1).update(
+            references=models.F('references') - 1,
+        ):
+            return False
+        deleted, _ = self.filter(name=name).delete()
+        if not deleted:
+            return False
+
+        def delete_file():
+            if not self.filter(name=name).exists():
+                content_addressed_storage().delete_with_variants(name)
+
+        transaction.on_commit(delete_file)
+        return True
+
+
+class StoredFile(models.Model):
+    """Number of references to a content addressed media file.
+
+    Identical uploads share one file, which is deleted when the last
+    project using it lets go of it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = StoredFileManager()
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    """Background job stored in the database, see ``core.jobs``."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    job_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker while the job runs, see core.jobs.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['run_at'],
+                condition=models.Q(status='queued'),
+                name='job_queued_run_at',
+            ),
+            models.Index(
+                fields=['job_type', 'finished_at'],
+                name='job_type_finished_at',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.job_type} #{self.pk}'
@@ -0,0 +1,103 @@
+"""
+Database routing to read replicas.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+
+# Alias of the replica the current request or block reads from, if any.
+_replica_reads = ContextVar('replica_reads', default=None)
+
+
+def choose_replica():
+    """Return a random replica alias, None without replicas."""
+    if settings.DB_REPLICAS:
+        return random.choice(settings.DB_REPLICAS)
+    return None
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads of a block to one of the replicas, if any.
+
+    All reads of the block use the same replica, so they see the same
+    point in time, e.g. a data version and the rows it describes.
+    """
+    token = _replica_reads.set(choose_replica())
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _pin_key(user_id):
+    return f'replica:pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """Read a user's data from the primary for a while after a write."""
+    cache.set(_pin_key(user.pk), True, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    """Return whether a user recently wrote."""
+    return bool(cache.get(_pin_key(user.pk)))
+
+
+class ReplicaRouter:
+    """Route reads to replicas inside ``replica_reads`` blocks.
+
+    Everything else, writes and reads outside those blocks, uses the
+    primary ``default`` database. Replicas are never migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica_reads.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DB_REPLICAS
+
+
+class ReplicaReadMixin:
+    """Serve the safe requests of a view from the read replicas.
+
+    Users are pinned to the primary for ``DB_REPLICA_PIN_SECONDS`` after
+    an unsafe request, so they read their own writes despite replica
+    lag. Authentication and permission checks use the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        # finalize_response is skipped when the view raises, so make sure
+        # reads after this request do not stay on the replicas.
+        token = _replica_reads.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS and settings.DB_REPLICAS
+                and not (request.user.is_authenticated
+                         and is_pinned(request.user))):
+            _replica_reads.set(choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if _replica_reads.get():
+            _replica_reads.set(None)
+        elif (request.method not in SAFE_METHODS
+              and request.user.is_authenticated):
+            pin_to_primary(request.user)
+
+        return super().finalize_response(request, response, *args, **kwargs)
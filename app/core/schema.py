@@ -0,0 +1,176 @@
+"""
+Pre-generated OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is
+done once per code version: by the ``cache_schema`` command when the
+container starts, or by the first request that finds no cached copy.
+The rendered documents are kept in files under ``SCHEMA_CACHE_DIR`` and
+in the memory of each process.
+"""
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from functools import lru_cache
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+_schemas = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Return the version the cached schemas are valid for.
+
+    ``APP_VERSION`` if set, else a hash of the Python sources of the
+    project, together with the API and drf-spectacular versions.
+    """
+    digest = hashlib.sha256()
+    for part in (settings.SPECTACULAR_SETTINGS.get('VERSION', ''),
+                 drf_spectacular.__version__, settings.APP_VERSION):
+        digest.update(f'{part}\0'.encode())
+    if not settings.APP_VERSION:
+        for root, dirs, files in os.walk(settings.BASE_DIR):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, settings.BASE_DIR)
+                                  .encode())
+                    with open(path, 'rb') as file:
+                        digest.update(file.read())
+
+    return digest.hexdigest()[:16]
+
+
+def schema_path(fmt, version=None):
+    """Return the file a rendered schema is cached in."""
+    return os.path.join(
+        settings.SCHEMA_CACHE_DIR,
+        f'schema-{version or code_version()}.{fmt}',
+    )
+
+
+def render_schema():
+    """Generate the schema and return it rendered in each format."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+        urlconf=spectacular_settings.SERVE_URLCONF,
+    )
+    schema = generator.get_schema(
+        request=None, public=spectacular_settings.SERVE_PUBLIC,
+    )
+    return {
+        fmt: renderer().render(schema, renderer.media_type, {})
+        for fmt, renderer in RENDERERS.items()
+    }
+
+
+def write_schema(documents):
+    """Write rendered schemas to the cache directory.
+
+    Files of other versions are removed. Files are written to temporary
+    names and moved into place, so readers never see a partial file.
+    """
+    os.makedirs(settings.SCHEMA_CACHE_DIR, exist_ok=True)
+    current = {os.path.basename(schema_path(fmt)) for fmt in documents}
+    for name in os.listdir(settings.SCHEMA_CACHE_DIR):
+        if name.startswith('schema-') and name not in current:
+            os.remove(os.path.join(settings.SCHEMA_CACHE_DIR, name))
+
+    for fmt, content in documents.items():
+        path = schema_path(fmt)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(content)
+        os.replace(temp_path, path)
+
+
+def read_schema():
+    """Return the cached schemas of this code version, or None."""
+    documents = {}
+    for fmt in RENDERERS:
+        try:
+            with open(schema_path(fmt), 'rb') as file:
+                documents[fmt] = file.read()
+        except FileNotFoundError:
+            return None
+
+    return documents
+
+
+def get_schema(fmt):
+    """Return a rendered schema and its ETag, generating it if needed."""
+    version = code_version()
+    if version not in _schemas:
+        with _lock:
+            if version not in _schemas:
+                documents = read_schema()
+                if documents is None:
+                    documents = render_schema()
+                    try:
+                        write_schema(documents)
+                    except OSError:
+                        logger.warning('Caching the schema in %s failed',
+                                       settings.SCHEMA_CACHE_DIR,
+                                       exc_info=True)
+                _schemas.clear()
+                _schemas[version] = {
+                    key: (content, quote_etag(
+                        hashlib.sha256(content).hexdigest()[:32]
+                    ))
+                    for key, content in documents.items()
+                }
+
+    return _schemas[version][fmt]
+
+
+def clear_schema_cache():
+    """Forget the schemas held in memory."""
+    _schemas.clear()
+    code_version.cache_clear()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the pre-generated schema with an ETag.
+
+    Requests for a translation or a specific API version are generated
+    on each request as before.
+    """
+
+    def _get_schema_response(self, request):
+        if (request.GET.get('lang') or self.api_version or request.version
+                or self._get_version_parameter(request)):
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        content, etag = get_schema(renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, None)}"'
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+
+        return response
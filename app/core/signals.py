@@ -0,0 +1,151 @@
+"""
+Signal handlers for core models.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import db
+from core.authentication import invalidate_token, invalidate_user
+from core.models import DataVersion, Project, StoredFile, Tag, Link
+
+
+_pending_bumps = ContextVar('pending_version_bumps', default=None)
+
+
+def bump_data_version(user_id):
+    """Increment a user's data version, or defer it inside a batch."""
+    pending = _pending_bumps.get()
+    if pending is None:
+        DataVersion.objects.bump([user_id])
+    else:
+        pending.add(user_id)
+
+
+@contextmanager
+def deferred_version_bumps():
+    """Collapse the version bumps of a block of writes into one query.
+
+    Bulk code paths that skip model signals (``bulk_create``,
+    ``bulk_update``) should call ``bump_data_version`` themselves from
+    inside this block.
+    """
+    if _pending_bumps.get() is not None:
+        yield
+        return
+
+    pending = set()
+    token = _pending_bumps.set(pending)
+    try:
+        yield
+    finally:
+        _pending_bumps.reset(token)
+    if pending:
+        DataVersion.objects.bump(pending)
+
+
+def touch_projects(project_ids):
+    """Mark projects as modified without sending save signals."""
+    Project.objects.filter(pk__in=project_ids).update(
+        modified_at=timezone.now()
+    )
+
+
+@receiver(request_started)
+def request_counted(sender, **kwargs):
+    """Count requests for the connection statistics."""
+    db.record('requests')
+
+
+@receiver(connection_created)
+def connection_counted(sender, connection, **kwargs):
+    """Count database connects for the connection statistics.
+
+    Pooled backends count their new connections themselves, as this is
+    also sent for connections taken from the pool.
+    """
+    db.record('checkouts')
+    if not getattr(connection, 'pooled', False):
+        db.record('connects')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, **kwargs):
+    """Start the data version of new users, refresh cached ones.
+
+    Cached tokens are invalidated once the change is committed, so a
+    concurrent request cannot cache the old user again after it.
+    """
+    if created:
+        DataVersion.objects.create(user=instance)
+    else:
+        transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the cache."""
+    transaction.on_commit(partial(invalidate_token, instance.key))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    """Bump the owner's version when a project changes."""
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    """Release the stored image of a deleted project."""
+    if instance.image:
+        StoredFile.objects.release(instance.image.name)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Link)
+def project_attr_changed(sender, instance, **kwargs):
+    """Bump the owner's version when a tag or link changes."""
+    bump_data_version(instance.user_id)
+    if kwargs.get('created') is False:
+        touch_projects(instance.project_set.values('pk'))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Link)
+def project_attr_deleting(sender, instance, **kwargs):
+    """Touch the projects that are about to lose a tag or link."""
+    touch_projects(instance.project_set.values('pk'))
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+@receiver(m2m_changed, sender=Project.links.through)
+def project_attrs_assigned(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Bump the version when tags or links are (un)assigned."""
+    if action == 'pre_clear' and reverse:
+        touch_projects(instance.project_set.values('pk'))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    bump_data_version(instance.user_id)
+    if not reverse:
+        touch_projects([instance.pk])
+    elif pk_set:
+        touch_projects(pk_set)
@@ -0,0 +1,80 @@
+"""
+Content addressed storage for uploaded media.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+def file_digest(file):
+    """Return the SHA-256 hex digest of a Django file's content."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def sharded_name(prefix, digest, ext=''):
+    """Return a path sharded by the first two bytes of a hex digest.
+
+    For example ``prefix/ab/cd/abcd....jpg``, which keeps every
+    directory small however many files are stored.
+    """
+    return os.path.join(prefix, digest[:2], digest[2:4], f'{digest}{ext}')
+
+
+def variant_prefix(name):
+    """Return the prefix of the names of files derived from a file."""
+    return f'{os.path.splitext(name)[0]}.'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage for files named after their content.
+
+    A name always holds the same content, so saving to an existing name
+    keeps the stored file, refreshing its modification time, instead of
+    adding a suffix. New files are
+    written to a temporary name and moved into place, so readers never
+    see a partial file.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            # Mark the file as just used, so a garbage collection run
+            # does not take it for an old orphan before the reference
+            # to it is committed.
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+
+        temp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
+
+    def delete_with_variants(self, name):
+        """Delete a file and the files derived from it next to it."""
+        directory, filename = os.path.split(name)
+        prefix = os.path.basename(variant_prefix(name))
+        try:
+            _, files = self.listdir(directory)
+        except FileNotFoundError:
+            return
+        for other in files:
+            if other == filename or other.startswith(prefix):
+                self.delete(os.path.join(directory, other))
+
+
+_storage = ContentAddressedStorage()
+
+
+def content_addressed_storage():
+    """Return the storage used for project images."""
+    return _storage
@@ -1,9 +1,35 @@
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from core import schema
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaCacheMixin:
+    """Cache schemas in a temporary directory."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        settings = self.settings(SCHEMA_CACHE_DIR=self.cache_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+
 
-class APIDocumentationTests(APITestCase):
+class APIDocumentationTests(SchemaCacheMixin, APITestCase):
     def test_schema_endpoint(self):
         """
         Test the API schema endpoint returns a 200 status
@@ -24,3 +50,87 @@ class APIDocumentationTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('text/html', response['Content-Type'])
+
+    def test_db_stats_response_documented(self):
+        """Test the database statistics response has a schema."""
+        res = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT='application/vnd.oai.openapi+json',
+        )
+
+        operation = json.loads(res.content)['paths']['/api/db-stats/']['get']
+        content = operation['responses']['200']['content']
+        self.assertEqual(content['application/json']['schema']['$ref'],
+                         '#/components/schemas/DatabaseConnectionStats')
+
+
+class CachedSchemaTests(SchemaCacheMixin, APITestCase):
+    """Test serving the pre-generated schema."""
+
+    def test_schema_generated_once(self):
+        """Test the schema is generated once and cached in a file."""
+        with patch('core.schema.render_schema',
+                   wraps=schema.render_schema) as render:
+            self.client.get(SCHEMA_URL)
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with open(schema.schema_path('yaml'), 'rb') as file:
+            self.assertEqual(res.content, file.read())
+
+    def test_etag(self):
+        """Test clients revalidate the schema with its ETag."""
+        res = self.client.get(SCHEMA_URL)
+        etag = res['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_json_format(self):
+        """Test the JSON schema is served when negotiated."""
+        yaml_res = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT='application/vnd.oai.openapi+json',
+        )
+
+        self.assertEqual(res['Content-Type'],
+                         'application/vnd.oai.openapi+json')
+        paths = json.loads(res.content)['paths']
+        self.assertIn('/api/project/projects/', paths)
+        self.assertNotEqual(res['ETag'], yaml_res['ETag'])
+
+    def test_new_version_regenerated(self):
+        """Test a new code version replaces the cached schema."""
+        with self.settings(APP_VERSION='1'):
+            schema.clear_schema_cache()
+            self.client.get(SCHEMA_URL)
+            old_path = schema.schema_path('yaml')
+
+        with self.settings(APP_VERSION='2'):
+            schema.clear_schema_cache()
+            with patch('core.schema.render_schema',
+                       wraps=schema.render_schema) as render:
+                self.client.get(SCHEMA_URL)
+            new_path = schema.schema_path('yaml')
+
+        render.assert_called_once()
+        self.assertNotEqual(old_path, new_path)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(new_path))
+
+    def test_cache_schema_command(self):
+        """Test the command generates the schema unless it is cached."""
+        out = io.StringIO()
+        call_command('cache_schema', stdout=out)
+        self.assertIn('Cached schema', out.getvalue())
+
+        with patch('core.schema.render_schema') as render:
+            res = self.client.get(SCHEMA_URL)
+            call_command('cache_schema', stdout=out)
+
+        render.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('is cached', out.getvalue())
@@ -0,0 +1,140 @@
+"""
+Tests for cached token authentication.
+"""
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, RequestFactory
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    LocalTTLCache,
+    local_tokens,
+    token_cache_key,
+)
+
+
+class LocalTTLCacheTests(TestCase):
+    """Test the in-process cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted when full."""
+        lru = LocalTTLCache(maxsize=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_expired_entries_are_missed(self):
+        """Test entries are dropped after their TTL."""
+        lru = LocalTTLCache(maxsize=2, ttl=0)
+        lru.set('a', 1)
+
+        self.assertIsNone(lru.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating tokens through the cache."""
+
+    def setUp(self):
+        local_tokens.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        self.auth = CachedTokenAuthentication()
+
+    def test_cached_lookup_runs_no_queries(self):
+        """Test repeated authentication is served from the cache."""
+        user, token = self.auth.authenticate(self.request)
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate(self.request)
+        self.assertEqual(user, self.user)
+
+        local_tokens.clear()
+        with self.assertNumQueries(0):
+            self.auth.authenticate(self.request)
+
+    def test_cache_key_hides_token(self):
+        """Test raw token keys are not used as cache keys."""
+        self.assertNotIn(self.token.key, token_cache_key(self.token.key))
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating."""
+        self.auth.authenticate(self.request)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(self.request)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user stops authenticating."""
+        self.auth.authenticate(self.request)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(self.request)
+
+    def test_updated_user_refreshed(self):
+        """Test user changes are visible on the next request."""
+        self.auth.authenticate(self.request)
+
+        self.user.name = 'Updated'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.save()
+
+        user, _ = self.auth.authenticate(self.request)
+        self.assertNotEqual(user.name, 'Updated')
+
+        for callback in callbacks:
+            callback()
+        user, _ = self.auth.authenticate(self.request)
+        self.assertEqual(user.name, 'Updated')
+
+    def test_password_hash_not_cached(self):
+        """Test cached users hold no password hash and are saved safely."""
+        self.auth.authenticate(self.request)
+        cached = cache.get(token_cache_key(self.token.key))
+        self.assertNotIn(self.user.password, repr(cached))
+
+        local_tokens.clear()
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate(self.request)
+        user.name = 'Updated'
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Updated')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_bench_auth_command(self):
+        """Test the benchmark reports every tier and cleans up."""
+        out = io.StringIO()
+
+        call_command('bench_auth', requests=5, stdout=out)
+
+        for tier in ('database', 'shared cache', 'local cache'):
+            self.assertIn(tier, out.getvalue())
+        self.assertFalse(get_user_model().objects.filter(
+            email='bench-auth@example.com',
+        ).exists())
@@ -1,13 +1,19 @@
 """
 Test custom Django management commands.
 """
+import io
+import os
+import tempfile
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.management.commands import prepare_start
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +38,68 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_check):
+        """Test the wait between attempts doubles up to the maximum."""
+        patched_check.side_effect = [OperationalError] * 4 + [True]
+
+        call_command('wait_for_db', max_delay=0.5, stdout=io.StringIO())
+
+        self.assertEqual(
+            [call.args[0] for call in patched_sleep.call_args_list],
+            [0.1, 0.2, 0.4, 0.5],
+        )
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_check):
+        """Test waiting fails once the timeout is exceeded."""
+        patched_check.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', timeout=0, stdout=io.StringIO())
+
+        patched_sleep.assert_not_called()
+
+
+class PrepareStartCommandTests(TestCase):
+    """Test the start up steps of the server."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = self.settings(
+            STATIC_ROOT=os.path.join(directory.name, 'static'),
+            SCHEMA_CACHE_DIR=os.path.join(directory.name, 'schema'),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_prepare_start(self):
+        """Test static files are only collected when they changed."""
+        out = io.StringIO()
+        call_command('prepare_start', stdout=out)
+
+        self.assertIn('Static files collected.', out.getvalue())
+        self.assertIn('No migrations to apply', out.getvalue())
+        self.assertIn('[start] total', out.getvalue())
+        self.assertTrue(os.path.exists(prepare_start.static_hash_path()))
+
+        out = io.StringIO()
+        call_command('prepare_start', stdout=out)
+
+        self.assertIn('Static files unchanged', out.getvalue())
+
+    @patch('core.management.commands.prepare_start.call_command')
+    @patch('core.management.commands.prepare_start.pending_migrations')
+    def test_migrates_when_pending(self, patched_pending, patched_call):
+        """Test migrate only runs when migrations are pending."""
+        command = prepare_start.Command(stdout=io.StringIO())
+        patched_pending.return_value = []
+        command.migrate()
+        patched_call.assert_not_called()
+
+        patched_pending.return_value = [('migration', False)]
+        command.migrate()
+        patched_call.assert_called_once()
+        self.assertEqual(patched_call.call_args.args, ('migrate',))
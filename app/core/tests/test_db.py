@@ -0,0 +1,134 @@
+"""
+Tests for database connection pooling and statistics.
+"""
+import io
+import threading
+from unittest.mock import MagicMock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import ConnectionPool, PoolTimeout, connection_stats
+
+
+DB_STATS_URL = reverse('db-stats')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test handing out and reusing connections."""
+
+    def test_reuses_released_connections(self):
+        """Test released connections are handed out again."""
+        pool = ConnectionPool(max_size=2, timeout=1)
+        connection = pool.acquire(MagicMock)
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(MagicMock), connection)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_counts_physical_connects(self):
+        """Test reused connections are not counted as connects."""
+        pool = ConnectionPool(max_size=2, timeout=1)
+        before = connection_stats()['connects']
+
+        pool.release(pool.acquire(MagicMock))
+        pool.acquire(MagicMock)
+
+        self.assertEqual(connection_stats()['connects'], before + 1)
+
+    def test_replaces_broken_connections(self):
+        """Test connections failing the check are closed and replaced."""
+        pool = ConnectionPool(max_size=1, timeout=1)
+        broken = pool.acquire(MagicMock)
+        pool.release(broken)
+
+        connection = pool.acquire(MagicMock, check=lambda conn: False)
+
+        self.assertIsNot(connection, broken)
+        broken.close.assert_called_once()
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_times_out_when_exhausted(self):
+        """Test acquiring fails once the wait exceeds the timeout."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.acquire(MagicMock)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(MagicMock)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waits_for_released_connection(self):
+        """Test a waiting thread gets the next released connection."""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.acquire(MagicMock)
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(pool.acquire(MagicMock)),
+        )
+        thread.start()
+
+        pool.release(connection)
+        thread.join()
+
+        self.assertEqual(acquired, [connection])
+        self.assertGreater(pool.stats()['wait_seconds_max'], 0)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failed connect does not use up the pool."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        with self.assertRaises(OSError):
+            pool.acquire(MagicMock(side_effect=OSError))
+
+        self.assertIsNotNone(pool.acquire(MagicMock))
+
+
+class DbStatsApiTests(TestCase):
+    """Test the connection statistics endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+
+    def test_staff_only(self):
+        """Test users that are not staff are refused."""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats(self):
+        """Test staff get the statistics of the worker."""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('connects_per_request', res.data)
+        self.assertIn('checkouts', res.data)
+        self.assertIn('conn_max_age', res.data['databases']['default'])
+
+
+class BenchDbCommandTests(TransactionTestCase):
+    """Test the connection benchmark, which closes connections."""
+
+    def test_bench_db_command(self):
+        """Test the benchmark reports both modes."""
+        out = io.StringIO()
+
+        call_command('bench_db', requests=3, stdout=out)
+
+        self.assertIn('connection per request', out.getvalue())
+        self.assertIn('persistent connection', out.getvalue())
@@ -0,0 +1,188 @@
+"""
+Tests for the background job queue.
+"""
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+
+calls = []
+
+
+@jobs.register('test.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.register('test.fail')
+def fail():
+    raise ValueError('Boom')
+
+
+class JobQueueTests(TestCase):
+    """Test queueing, claiming and running jobs."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_unknown_type_error(self):
+        """Test queueing a job without a handler fails."""
+        with self.assertRaises(ValueError):
+            jobs.enqueue('test.unknown')
+
+    def test_claim_and_run(self):
+        """Test due jobs are claimed once and run."""
+        job = jobs.enqueue('test.record', {'value': 1})
+        jobs.enqueue('test.record', {'value': 2},
+                     run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = jobs.claim('worker-1', limit=10)
+
+        self.assertEqual(claimed, [job])
+        self.assertEqual(jobs.claim('worker-2'), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+        self.assertEqual(job.attempts, 1)
+
+        self.assertTrue(jobs.run(claimed[0]))
+
+        self.assertEqual(calls, [1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claim_filtered_by_type(self):
+        """Test workers can be limited to some job types."""
+        jobs.enqueue('test.fail')
+        job = jobs.enqueue('test.record', {'value': 1})
+
+        self.assertEqual(jobs.claim('worker', ['test.record'], limit=10),
+                         [job])
+
+    @override_settings(JOB_BACKOFF_BASE=10, JOB_BACKOFF_MAX=15)
+    def test_failed_job_retried_with_backoff(self):
+        """Test failed attempts are retried later until none are left."""
+        job = jobs.enqueue('test.fail', max_attempts=3)
+
+        for attempt in range(1, 4):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            with patch('core.jobs.random.uniform', return_value=1):
+                self.assertFalse(jobs.run(jobs.claim('worker')[0]))
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('ValueError: Boom', job.last_error)
+            if attempt < 3:
+                self.assertEqual(job.status, Job.STATUS_QUEUED)
+                delay = (job.run_at - timezone.now()).total_seconds()
+                self.assertAlmostEqual(delay, min(10 * 2 ** (attempt - 1),
+                                                  15), delta=1)
+
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+
+    def test_recover_stale_jobs(self):
+        """Test jobs of lost workers are queued again."""
+        job = jobs.enqueue('test.record', {'value': 1})
+        jobs.claim('lost-worker')
+        Job.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(jobs.recover_stale(timeout=60), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(jobs.claim('worker'), [job])
+
+    def test_long_running_job_with_heartbeat_kept(self):
+        """Test jobs still sending heartbeats are not recovered."""
+        job = jobs.enqueue('test.record', {'value': 1})
+        jobs.claim('worker')
+        Job.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(jobs.heartbeat([job.pk]), 1)
+
+        self.assertEqual(jobs.recover_stale(timeout=60), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+
+    def test_prune_and_metrics(self):
+        """Test old succeeded jobs are deleted and metrics reported."""
+        for value in range(3):
+            jobs.enqueue('test.record', {'value': value})
+        jobs.enqueue('test.fail', max_attempts=1)
+        for job in jobs.claim('worker', limit=10):
+            jobs.run(job)
+        jobs.enqueue('test.record', {'value': 3})
+
+        metrics = {
+            row['job_type']: row
+            for row in jobs.job_metrics(timezone.now() - timedelta(hours=1))
+        }
+
+        self.assertEqual(metrics['test.record']['succeeded'], 3)
+        self.assertEqual(metrics['test.record']['queued'], 1)
+        self.assertEqual(metrics['test.fail']['failed'], 1)
+        self.assertGreater(metrics['test.record']['per_minute'], 0)
+
+        Job.objects.filter(status=Job.STATUS_SUCCEEDED).update(
+            finished_at=timezone.now() - timedelta(days=30),
+        )
+        self.assertEqual(jobs.prune(retention=3600), 3)
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_run_worker_burst(self):
+        """Test the worker command runs due jobs and reports them."""
+        for value in range(3):
+            jobs.enqueue('test.record', {'value': value})
+        out = io.StringIO()
+
+        call_command('run_worker', burst=True, concurrency=1, stdout=out)
+
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertIn('test.record: 3 succeeded, 0 failed', out.getvalue())
+        self.assertFalse(
+            Job.objects.exclude(status=Job.STATUS_SUCCEEDED).exists()
+        )
+
+    def test_run_worker_survives_database_error(self):
+        """Test a failed status update does not stop the worker."""
+        for value in range(2):
+            jobs.enqueue('test.record', {'value': value})
+        run = jobs.run
+        results = [DatabaseError]
+
+        def flaky_run(job):
+            if results:
+                raise results.pop()
+            return run(job)
+
+        with patch.object(jobs, 'run', flaky_run), \
+                self.assertLogs('core.management.commands.run_worker'):
+            call_command('run_worker', burst=True, concurrency=1,
+                         stdout=io.StringIO())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            Job.objects.filter(status=Job.STATUS_RUNNING).count(), 1,
+        )
+
+    def test_job_stats_command(self):
+        """Test the stats command lists job types."""
+        jobs.enqueue('test.record', {'value': 1})
+        out = io.StringIO()
+
+        call_command('job_stats', stdout=out)
+
+        self.assertIn('test.record', out.getvalue())
@@ -1,11 +1,17 @@
 """
 Tests for models.
 """
-from unittest.mock import patch
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.storage import content_addressed_storage
+from core.signals import deferred_version_bumps
 
 
 def create_user(email='user@example.com', password='testpass123'):
@@ -87,11 +93,107 @@ class ModelTest(TestCase):
 
         self.assertEqual(str(link), link.text)
 
-    @patch('core.models.uuid.uuid4')
-    def test_project_file_name_uuid(self, mock_uuid):
-        """Test generating image path"""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
-        file_path = models.project_image_file_path(None, 'example.jpg')
+    def test_tag_names_unique_per_user(self):
+        """Test tag names are unique per user regardless of case."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name='Python')
+        other = create_user(email='other@example.com')
+        models.Tag.objects.create(user=other, name='python')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            models.Tag.objects.create(user=user, name='PYTHON')
+
+    def test_link_href_hash(self):
+        """Test links are unique by text and normalized href."""
+        user = create_user()
+        link = models.Link.objects.create(
+            user=user,
+            text='Docs',
+            href='https://Example.com:443/docs/?page=1',
+        )
+
+        self.assertEqual(
+            models.normalize_href(link.href),
+            'https://example.com/docs?page=1',
+        )
+        self.assertEqual(link.href_hash,
+                         models.hash_href('https://example.com/docs?page=1'))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            models.Link.objects.create(
+                user=user,
+                text='Docs',
+                href='https://example.com/docs?page=1',
+            )
+
+    def test_project_file_name_content_hash(self):
+        """Test generating image path from the image content."""
+        project = models.Project(image=SimpleUploadedFile('a.JPG', b'data'))
+        digest = hashlib.sha256(b'data').hexdigest()
+
+        file_path = models.project_image_file_path(project, 'example.JPG')
+
+        self.assertEqual(
+            file_path,
+            f'uploads/project/{digest[:2]}/{digest[2:4]}/{digest}.jpg',
+        )
+
+    def test_stored_file_references(self):
+        """Test a stored file is deleted after its last reference."""
+        storage = content_addressed_storage()
+        name = storage.save('uploads/test/ab/cd/abcd.txt',
+                            ContentFile(b'data'))
+        storage.save('uploads/test/ab/cd/abcd.thumbnail.jpg',
+                     ContentFile(b'thumb'))
+        self.addCleanup(storage.delete_with_variants, name)
+
+        models.StoredFile.objects.acquire(name)
+        models.StoredFile.objects.acquire(name)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(models.StoredFile.objects.release(name))
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(models.StoredFile.objects.release(name))
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(
+            storage.exists('uploads/test/ab/cd/abcd.thumbnail.jpg')
+        )
+        self.assertFalse(models.StoredFile.objects.exists())
+
+    def test_content_addressed_storage_keeps_existing(self):
+        """Test saving to an existing name keeps the stored file."""
+        storage = content_addressed_storage()
+        name = 'uploads/test/ef/01/ef01.txt'
+        self.addCleanup(storage.delete, name)
+
+        self.assertEqual(storage.save(name, ContentFile(b'data')), name)
+        self.assertEqual(storage.save(name, ContentFile(b'other')), name)
+
+        with storage.open(name) as f:
+            self.assertEqual(f.read(), b'data')
+        self.assertEqual(storage.listdir('uploads/test/ef/01')[1],
+                         ['ef01.txt'])
+
+    def test_data_version_bumped_on_writes(self):
+        """Test project, tag and assignment writes bump the version."""
+        user = create_user()
+        version = models.DataVersion.objects.current(user).version
+
+        project = models.Project.objects.create(user=user, title='Sample')
+        tag = models.Tag.objects.create(user=user, name='Tag1')
+        project.tags.add(tag)
+
+        current = models.DataVersion.objects.current(user).version
+        self.assertEqual(current, version + 3)
+
+    def test_deferred_version_bumps(self):
+        """Test a batch of writes bumps the version once."""
+        user = create_user()
+        version = models.DataVersion.objects.current(user).version
+
+        with deferred_version_bumps():
+            project = models.Project.objects.create(user=user, title='A')
+            project.tags.add(models.Tag.objects.create(user=user, name='T'))
 
-        self.assertEqual(file_path, f'uploads/project/{uuid}.jpg')
+        current = models.DataVersion.objects.current(user).version
+        self.assertEqual(current, version + 1)
@@ -0,0 +1,139 @@
+"""
+Tests for read replica routing.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from core.models import DataVersion, DataVersionManager, Project
+from core.routers import (
+    ReplicaReadMixin,
+    _replica_reads,
+    is_pinned,
+    replica_reads,
+)
+
+
+PROJECTS_URL = reverse('project:project-list')
+ME_URL = reverse('user:me')
+
+
+@override_settings(DB_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test choosing databases."""
+
+    def test_reads_use_replicas_when_enabled(self):
+        """Test only reads inside replica_reads go to a replica."""
+        self.assertEqual(Project.objects.all().db, 'default')
+
+        with replica_reads():
+            self.assertIn(Project.objects.all().db, ['replica1', 'replica2'])
+            self.assertEqual(router.db_for_write(Project), 'default')
+
+        self.assertEqual(Project.objects.all().db, 'default')
+
+    def test_block_reads_one_replica(self):
+        """Test every read of a block uses the same replica."""
+        with patch('core.routers.random.choice',
+                   side_effect=['replica1', 'replica2']) as choice:
+            with replica_reads():
+                self.assertEqual(Project.objects.all().db, 'replica1')
+                self.assertEqual(DataVersion.objects.all().db, 'replica1')
+
+        self.assertEqual(choice.call_count, 1)
+
+    @override_settings(DB_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test reads use the primary without replicas."""
+        with replica_reads():
+            self.assertEqual(Project.objects.all().db, 'default')
+
+    def test_reset_when_view_raises(self):
+        """Test a view raising an error does not leave reads on replicas."""
+        class FailingView(ReplicaReadMixin, APIView):
+            authentication_classes = []
+            permission_classes = []
+
+            def get(self, request):
+                raise RuntimeError
+
+        request = APIRequestFactory().get('/')
+
+        with self.assertRaises(RuntimeError):
+            FailingView.as_view()(request)
+
+        self.assertIsNone(_replica_reads.get())
+
+    def test_replicas_not_migrated(self):
+        """Test migrations only run on the primary."""
+        self.assertTrue(router.allow_migrate('default', 'core'))
+        self.assertFalse(router.allow_migrate('replica1', 'core'))
+
+
+@override_settings(DB_REPLICAS=['default'])
+class ReplicaReadViewTests(TestCase):
+    """Test views read from replicas unless the user just wrote."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        choice = patch('core.routers.random.choice', return_value='default')
+        self.choice = choice.start()
+        self.addCleanup(choice.stop)
+
+    def test_safe_requests_read_replicas(self):
+        """Test lists are read from a replica."""
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.choice.called)
+        self.assertEqual(Project.objects.all().db, 'default')
+
+    def test_writes_pin_user_to_primary(self):
+        """Test reads after a write use the primary for a while."""
+        res = self.client.post(PROJECTS_URL, {'title': 'New'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned(self.user))
+        self.choice.reset_mock()
+
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual([p['title'] for p in res.data], ['New'])
+        self.assertFalse(self.choice.called)
+
+        cache.clear()
+        self.client.get(PROJECTS_URL)
+        self.assertTrue(self.choice.called)
+
+    def test_user_update_pins_user(self):
+        """Test updating the user pins them to the primary."""
+        res = self.client.patch(ME_URL, {'name': 'Updated'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_pinned(self.user))
+
+    def test_data_version_read_from_replica(self):
+        """Test list ETags use the version of the replica read."""
+        etag = self.client.get(PROJECTS_URL)['ETag']
+        # The primary is ahead of the replica, e.g. after a background
+        # job wrote without pinning the user.
+        ahead = DataVersion(user=self.user, version=99,
+                            modified_at=timezone.now())
+
+        with patch.object(DataVersionManager, 'get_or_create',
+                          return_value=(ahead, False)):
+            res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(res['ETag'], etag)
@@ -0,0 +1,131 @@
+"""
+Tests for sliding window throttles.
+"""
+import io
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import SlidingWindowThrottle, retry_after
+
+
+TOKEN_URL = reverse('user:token')
+PROJECTS_URL = reverse('project:project-list')
+
+RATES = {
+    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'NUM_PROXIES': 1,
+    'DEFAULT_THROTTLE_RATES': {
+        'token:ip': '2/min',
+        'token:endpoint': '4/min',
+        'write:user': '1/min',
+    },
+}
+
+
+@override_settings(REST_FRAMEWORK=RATES)
+class ThrottleTests(TestCase):
+    """Test throttled endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        timer = patch.object(SlidingWindowThrottle, 'timer',
+                             return_value=600.0)
+        self.timer = timer.start()
+        self.addCleanup(timer.stop)
+
+    def post_token(self, address):
+        return self.client.post(TOKEN_URL, {'email': 'user@example.com',
+                                            'password': 'wrong'},
+                                HTTP_X_FORWARDED_FOR=address)
+
+    def test_token_throttled_per_ip(self):
+        """Test an address is throttled with a Retry-After header."""
+        for _ in range(2):
+            res = self.post_token('192.0.2.1')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.post_token('192.0.2.1')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '60')
+
+    def test_spoofed_forwarded_for_ignored(self):
+        """Test addresses sent by the client do not change the bucket."""
+        for number in range(2):
+            res = self.post_token(f'203.0.113.{number}, 192.0.2.1')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.post_token('203.0.113.9, 192.0.2.1')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_token_throttled_per_endpoint(self):
+        """Test the endpoint limit applies across addresses."""
+        for address in ('192.0.2.1', '192.0.2.2', '192.0.2.3',
+                        '192.0.2.4'):
+            res = self.post_token(address)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.post_token('192.0.2.5')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_previous_window_fades(self):
+        """Test requests of the previous window count less over time."""
+        self.timer.return_value = 650.0
+        for _ in range(2):
+            self.post_token('192.0.2.1')
+
+        self.timer.return_value = 665.0
+        res = self.post_token('192.0.2.1')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.post_token('192.0.2.1')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '25')
+
+        self.timer.return_value = 691.0
+        res = self.post_token('192.0.2.1')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_throttled_per_user(self):
+        """Test writes are throttled and reads are not."""
+        user = get_user_model().objects.create_user('user@example.com',
+                                                    'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.post(PROJECTS_URL, {'title': 'A'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.post(PROJECTS_URL, {'title': 'B'})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.get(PROJECTS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class ThrottleHelperTests(TestCase):
+    """Test the throttle helpers and benchmark."""
+
+    def test_wait_for_previous_window_to_fade(self):
+        """Test waiting while the previous window still counts."""
+        self.assertAlmostEqual(retry_after(10, 60, 10, 5, 0.25), 15)
+
+    def test_wait_for_next_window(self):
+        """Test waiting out a full current window."""
+        self.assertAlmostEqual(retry_after(10, 60, 0, 20, 0.5), 60)
+
+    def test_bench_throttle_command(self):
+        """Test the benchmark reports both throttles."""
+        out = io.StringIO()
+
+        call_command('bench_throttle', requests=5, stdout=out)
+
+        self.assertIn('sliding window', out.getvalue())
+        self.assertIn('history', out.getvalue())
@@ -0,0 +1,131 @@
+"""
+Sliding window rate throttles.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+def parse_rate(rate):
+    """Return ``(requests, seconds)`` for a rate like ``'10/min'``."""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+def retry_after(limit, duration, previous, current, progress):
+    """Return the seconds until a sliding window admits a request.
+
+    ``progress`` is the elapsed fraction of the current window.
+    """
+    if not limit:
+        return duration
+    if current < limit:
+        # The previous window's weight fades until enough room is left.
+        target = 1 - (limit - current) / previous
+        return max(target - progress, 0) * duration
+    # Wait for the next window, where this one's count starts fading.
+    target = 1 - limit / current
+    return (1 - progress + target) * duration
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle requests with a sliding window counter.
+
+    Counts are kept per fixed window in the ``THROTTLE_CACHE`` cache and
+    the previous window is weighted by how much of it still overlaps the
+    sliding window. That costs two small cache round trips per request,
+    whatever the rate.
+
+    The rate is looked up as ``'<view.throttle_scope>:<kind>'`` in the
+    ``DEFAULT_THROTTLE_RATES`` setting, requests are not throttled when
+    no rate is set.
+    """
+    kind = None
+    exempt_safe_methods = False
+    timer = time.time
+
+    def get_ident(self, request):
+        """Return what requests are counted by."""
+        raise NotImplementedError('.get_ident() must be overridden')
+
+    def get_rate(self, view):
+        """Return the rate for the view, or None."""
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}:{self.kind}')
+
+    def allow_request(self, request, view):
+        if self.exempt_safe_methods and request.method in SAFE_METHODS:
+            return True
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+
+        limit, duration = parse_rate(rate)
+        now = self.timer()
+        window = int(now // duration)
+        prefix = (f'throttle:{view.throttle_scope}:{self.kind}:'
+                  f'{self.get_ident(request)}:')
+        key, previous_key = f'{prefix}{window}', f'{prefix}{window - 1}'
+        cache = caches[settings.THROTTLE_CACHE]
+
+        counts = cache.get_many([previous_key, key])
+        previous, current = counts.get(previous_key, 0), counts.get(key, 0)
+        progress = now / duration - window
+        if previous * (1 - progress) + current >= limit:
+            self.wait_seconds = retry_after(limit, duration, previous,
+                                            current, progress)
+            return False
+
+        if key in counts:
+            try:
+                cache.incr(key)
+                return True
+            except ValueError:
+                pass
+        if not cache.add(key, 1, 2 * duration):
+            cache.incr(key)
+        return True
+
+    def wait(self):
+        if not hasattr(self, 'wait_seconds'):
+            return None
+        # Retry-After is whole seconds, DRF rounds this up. Round off
+        # float noise first so 25.000000001 does not become 26.
+        return max(round(self.wait_seconds, 3), 1)
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Throttle requests per client address."""
+    kind = 'ip'
+
+    def get_ident(self, request):
+        return BaseThrottle.get_ident(self, request)
+
+
+class UserThrottle(SlidingWindowThrottle):
+    """Throttle requests per user, or per address when anonymous."""
+    kind = 'user'
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return f'ip-{BaseThrottle.get_ident(self, request)}'
+
+
+class UserWriteThrottle(UserThrottle):
+    """Throttle the unsafe requests of each user."""
+    exempt_safe_methods = True
+
+
+class EndpointThrottle(SlidingWindowThrottle):
+    """Throttle all requests to an endpoint together."""
+    kind = 'endpoint'
+
+    def get_ident(self, request):
+        return 'all'
@@ -1,11 +1,54 @@
 """
 Core views for app.
 """
-from rest_framework.decorators import api_view
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import serializers
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from core.authentication import CachedTokenAuthentication
+from core.db import connection_stats
+
+
+POOL_STATS = inline_serializer('PoolStats', allow_null=True, fields={
+    **{name: serializers.IntegerField() for name in (
+        'max_size', 'size', 'idle', 'in_use',
+        'acquired', 'created', 'reused', 'discarded', 'timeouts',
+    )},
+    'wait_seconds_total': serializers.FloatField(),
+    'wait_seconds_max': serializers.FloatField(),
+})
+
+DATABASE_STATS = inline_serializer('DatabaseStats', {
+    'engine': serializers.CharField(),
+    'conn_max_age': serializers.IntegerField(allow_null=True),
+    'conn_health_checks': serializers.BooleanField(),
+    'pool': POOL_STATS,
+})
+
 
 @api_view(['GET'])
 def health_check(request):
     """Returns successful response."""
     return Response({'healthy': True})
+
+
+@extend_schema(responses=inline_serializer('DatabaseConnectionStats', {
+    'pid': serializers.IntegerField(),
+    'requests': serializers.IntegerField(),
+    'connects': serializers.IntegerField(),
+    'checkouts': serializers.IntegerField(),
+    'connects_per_request': serializers.FloatField(allow_null=True),
+    'databases': serializers.DictField(child=DATABASE_STATS),
+}))
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+def db_stats(request):
+    """Returns the database connection statistics of this worker."""
+    return Response(connection_stats())
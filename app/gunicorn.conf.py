@@ -0,0 +1,107 @@
+"""
+Gunicorn configuration, tuned through environment variables.
+
+GUNICORN_WORKER_CLASS   sync (default), gthread or uvicorn. uvicorn
+                        serves app.asgi, the others app.wsgi.
+GUNICORN_WORKERS        Worker processes, derived from the CPUs
+                        available, including a container's CPU quota,
+                        by default.
+GUNICORN_MAX_WORKERS    Upper bound of the derived worker count, 8 by
+                        default, as each worker keeps its own database
+                        connections open.
+GUNICORN_THREADS        Threads per gthread worker, 4 by default.
+GUNICORN_PRELOAD        1 (default) loads the app before forking so
+                        workers share its memory.
+GUNICORN_MAX_REQUESTS   Requests after which a worker is replaced, 0 to
+                        never recycle. Spread by
+                        GUNICORN_MAX_REQUESTS_JITTER so workers do not
+                        restart together.
+GUNICORN_TIMEOUT        Seconds before a silent worker is killed.
+GUNICORN_GRACEFUL_TIMEOUT  Seconds workers get to finish on restart.
+GUNICORN_KEEPALIVE      Seconds to keep idle client connections open.
+GUNICORN_BIND           Address to listen on, :9000 by default.
+"""
+import math
+import os
+
+
+def env_int(name, default):
+    """Return an integer environment variable, if set and not empty."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def read_ints(path):
+    """Return the integers of a one line cgroup file, None if unreadable."""
+    try:
+        with open(path) as file:
+            return [int(value) for value in
+                    file.read().replace('max', '-1').split()]
+    except (OSError, ValueError):
+        return None
+
+
+def cpu_quota():
+    """Return the CPUs the cgroup CPU quota allows, None if unlimited."""
+    limit = read_ints('/sys/fs/cgroup/cpu.max')
+    if limit is None:
+        quota = read_ints('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = read_ints('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        limit = quota + period if quota and period else None
+    if not limit or len(limit) != 2 or limit[0] <= 0 or limit[1] <= 0:
+        return None
+    return max(1, math.ceil(limit[0] / limit[1]))
+
+
+def cpu_count():
+    """Return the number of CPUs this process may run on.
+
+    The affinity mask lists the host's CPUs in a container limited by a
+    CPU quota, so the quota is applied on top.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return min(cpus, cpu_quota() or cpus)
+
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+worker_type = os.environ.get('GUNICORN_WORKER_CLASS') or 'sync'
+if worker_type not in WORKER_CLASSES:
+    raise ValueError(
+        f'GUNICORN_WORKER_CLASS must be one of {", ".join(WORKER_CLASSES)}, '
+        f'not {worker_type!r}.'
+    )
+worker_class = WORKER_CLASSES[worker_type]
+wsgi_app = 'app.asgi:application' if worker_type == 'uvicorn' else (
+    'app.wsgi:application'
+)
+
+cpus = cpu_count()
+# Sync workers block on I/O, so run more of them than CPUs. Threaded and
+# async workers overlap I/O themselves.
+workers = env_int('GUNICORN_WORKERS', min({
+    'sync': 2 * cpus + 1,
+    'gthread': cpus + 1,
+    'uvicorn': cpus,
+}[worker_type], env_int('GUNICORN_MAX_WORKERS', 8)))
+threads = env_int('GUNICORN_THREADS', 4 if worker_type == 'gthread' else 1)
+
+bind = os.environ.get('GUNICORN_BIND') or ':9000'
+preload_app = bool(env_int('GUNICORN_PRELOAD', 1))
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER',
+                              max_requests // 10)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Heartbeat files on tmpfs, a disk-backed /tmp can stall workers.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
@@ -0,0 +1,101 @@
+"""
+Async GET handlers for the project API, see ``core.async_views``.
+
+Each handler answers like the viewset action it replaces.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django.urls import path, re_path
+from rest_framework.response import Response
+
+from core.async_views import as_async_view, paginate
+from core.models import DataVersion, Project
+from project import serializers, views
+
+
+async def list_objects(view, request):
+    """List the filtered objects of a viewset."""
+    queryset = view.filter_queryset(view.get_queryset())
+    fast = isinstance(view, views.FastListMixin) and (
+        settings.PROJECT_LIST_FAST_PATH
+    )
+    if fast:
+        fields = view.get_serializer_class().selected_fields(
+            request.query_params
+        )
+        queryset = queryset.prefetch_related(None).values(
+            *serializers.project_list_values(fields)
+        )
+
+    page = await paginate(view, queryset)
+    items = page if page is not None else [item async for item in queryset]
+    if fast:
+        # Loads the tags and links, so it runs in the database thread.
+        data = await sync_to_async(serializers.project_list_data)(
+            items, fields, request=request,
+        )
+    else:
+        data = view.get_serializer(items, many=True).data
+    if page is not None:
+        return view.get_paginated_response(data)
+
+    return Response(data)
+
+
+async def conditional_list(view, request):
+    """List objects, honouring conditional request headers."""
+    version = await DataVersion.objects.acurrent(request.user)
+    etag = view._make_etag(request, 'list', version.version)
+
+    return await view._aconditional(
+        request, etag, version.modified_at,
+        lambda request: list_objects(view, request),
+    )
+
+
+async def retrieve_project(view, request, pk):
+    """Retrieve a project, honouring conditional request headers."""
+    async def retrieve(request):
+        queryset = view.filter_queryset(view.get_queryset())
+        try:
+            project = await queryset.aget(pk=pk)
+        except (Project.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        view.check_object_permissions(request, project)
+        return Response(view.get_serializer(project).data)
+
+    try:
+        modified_at = await Project.objects.filter(
+            user=request.user,
+            pk=pk,
+        ).values_list('modified_at', flat=True).afirst()
+    except (TypeError, ValueError):
+        modified_at = None
+    if modified_at is None:
+        return await retrieve(request)
+
+    etag = view._make_etag(request, 'detail', modified_at.isoformat())
+
+    return await view._aconditional(request, etag, modified_at, retrieve)
+
+
+urlpatterns = [
+    path('projects/', as_async_view(
+        views.ProjectViewSet,
+        {'get': 'list', 'post': 'create'},
+        conditional_list,
+    ), name='project-list'),
+    re_path(r'^projects/(?P<pk>[^/.]+)/$', as_async_view(
+        views.ProjectViewSet,
+        {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+         'delete': 'destroy'},
+        retrieve_project,
+    ), name='project-detail'),
+    path('tags/', as_async_view(
+        views.TagViewSet, {'get': 'list'}, conditional_list,
+    ), name='tag-list'),
+    path('links/', as_async_view(
+        views.LinkViewSet, {'get': 'list'}, conditional_list,
+    ), name='link-list'),
+]
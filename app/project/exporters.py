@@ -0,0 +1,84 @@
+"""
+Streaming exports of a user's projects.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from core.models import Project
+from project.serializers import project_list_data
+
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+FIELDS = ('id', 'title', 'bodyText', 'tags', 'links')
+
+
+class _Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_projects(user, chunk_size=1000):
+    """Yield the user's projects as dicts, oldest first.
+
+    Rows are read through a server-side cursor and tags and links are
+    loaded per chunk, so memory use does not depend on the number of
+    projects.
+    """
+    rows = Project.objects.filter(user=user).order_by('id').values(
+        'id', 'title', 'bodyText',
+    ).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from project_list_data(chunk, FIELDS)
+            chunk = []
+    if chunk:
+        yield from project_list_data(chunk, FIELDS)
+
+
+def iter_ndjson(projects):
+    """Yield one JSON document per project."""
+    for project in projects:
+        yield json.dumps(project, ensure_ascii=False) + '\n'
+
+
+def iter_csv(projects):
+    """Yield CSV lines, with tags and links encoded as JSON arrays."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for project in projects:
+        yield writer.writerow([
+            json.dumps(project[field], ensure_ascii=False)
+            if field in ('tags', 'links') else project[field]
+            for field in FIELDS
+        ])
+
+
+def export_projects(user, export_format, chunk_size=1000):
+    """Return an iterator over the user's projects in the given format."""
+    projects = iter_projects(user, chunk_size=chunk_size)
+    if export_format == 'csv':
+        return iter_csv(projects)
+
+    return iter_ndjson(projects)
+
+
+async def aiter_export(lines, batch_size=100):
+    """Yield the lines of an export in batches, for ASGI responses.
+
+    Django buffers sync iterators of streaming responses under ASGI, so
+    the lines are read in the database thread a batch at a time.
+    """
+    next_batch = sync_to_async(lambda: ''.join(islice(lines, batch_size)))
+    while batch := await next_batch():
+        yield batch
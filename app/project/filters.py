@@ -0,0 +1,159 @@
+"""
+Filters for the project API.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from rest_framework.exceptions import ValidationError
+
+from core.models import Project
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+
+def params_to_ints(qs):
+    """Convert a comma separated string of IDs to a list of integers."""
+    try:
+        return [int(str_id) for str_id in qs.split(',') if str_id.strip()]
+    except ValueError:
+        raise ValidationError({'detail': f'Invalid ID list: {qs}'})
+
+
+def param_to_bool(query_params, name):
+    """Return the value of a 0/1 query param, False when missing."""
+    value = query_params.get(name, '0')
+    if value not in ('0', '1'):
+        raise ValidationError({'detail': f'Invalid value for {name}: {value}'})
+    return value == '1'
+
+
+def _project_rows(field):
+    """Return the through rows linking projects to the outer object."""
+    m2m = Project._meta.get_field(field)
+    target = m2m.m2m_reverse_field_name()
+    return m2m.remote_field.through.objects.filter(
+        **{target: OuterRef('pk')}
+    ), target
+
+
+def filter_assigned(queryset, field):
+    """Keep the tags or links assigned to at least one project.
+
+    Like ``filter_related`` this uses a correlated subquery on the
+    through table instead of a join, so no DISTINCT is needed.
+    """
+    rows, _ = _project_rows(field)
+    return queryset.filter(Exists(rows))
+
+
+def annotate_project_count(queryset, field):
+    """Annotate the tags or links with the number of projects using them.
+
+    The counts are computed by the same query with a correlated
+    aggregate over the through table's index.
+    """
+    rows, target = _project_rows(field)
+    counts = rows.values(target).annotate(n=Count('*')).values('n')
+    return queryset.annotate(
+        project_count=Coalesce(Subquery(counts), 0),
+    )
+
+
+def filter_related(queryset, field, ids, match=MATCH_ANY):
+    """Filter projects by the IDs of a many-to-many relation.
+
+    Each project is checked with a correlated subquery on the through
+    table, so no join fans out the rows and no DISTINCT is needed.
+    ``any`` keeps projects with at least one of the IDs, ``all`` keeps
+    projects carrying every one of them.
+    """
+    m2m = Project._meta.get_field(field)
+    source = m2m.m2m_field_name()
+    rows = m2m.remote_field.through.objects.filter(**{
+        source: OuterRef('pk'),
+        f'{m2m.m2m_reverse_field_name()}__in': ids,
+    })
+    if match == MATCH_ALL:
+        matched = rows.values(source).annotate(n=Count('*')).values('n')
+        return queryset.alias(
+            **{f'_{field}_matched': Subquery(matched)}
+        ).filter(**{f'_{field}_matched': len(set(ids))})
+
+    return queryset.filter(Exists(rows))
+
+
+def _uses_search_vector(queryset):
+    """Return whether the queryset's database maintains the vector."""
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def search_projects(queryset, text, ranked=False):
+    """Filter projects matching a full-text search on title and body.
+
+    PostgreSQL matches a web search style query against the GIN indexed
+    search vector. Other databases fall back to requiring every word in
+    the title or body, which scans the table and is only meant for
+    development and tests. With ``ranked`` a ``rank`` annotation is
+    added, higher for better matches.
+    """
+    if _uses_search_vector(queryset):
+        query = SearchQuery(
+            text, config='pg_catalog.english', search_type='websearch',
+        )
+        queryset = queryset.filter(search_vector=query)
+        if ranked:
+            queryset = queryset.annotate(
+                rank=SearchRank(F('search_vector'), query),
+            )
+        return queryset
+
+    for word in text.split():
+        queryset = queryset.filter(
+            Q(title__icontains=word) | Q(bodyText__icontains=word)
+        )
+    if ranked:
+        title_matches = Q()
+        for word in text.split():
+            title_matches &= Q(title__icontains=word)
+        queryset = queryset.annotate(rank=Case(
+            When(title_matches, then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        ))
+
+    return queryset
+
+
+def filter_projects(queryset, query_params):
+    """Apply the search, tag and link filters from the query params."""
+    match = query_params.get('match', MATCH_ANY)
+    if match not in MATCH_MODES:
+        raise ValidationError(
+            {'match': f'Must be one of: {", ".join(MATCH_MODES)}.'}
+        )
+    for field in ('tags', 'links'):
+        value = query_params.get(field)
+        if value:
+            ids = params_to_ints(value)
+            queryset = filter_related(queryset, field, ids, match)
+    search = query_params.get('search', '').strip()
+    if search:
+        queryset = search_projects(queryset, search)
+
+    return queryset
@@ -0,0 +1,138 @@
+"""
+Resized derivatives of project images.
+"""
+import io
+import logging
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from core import jobs
+from core.models import Project
+from core.signals import bump_data_version
+from core.storage import variant_prefix
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def derivative_path(image_name, name, image_format):
+    """Return the storage path of a derivative of an image.
+
+    Derivatives are stored next to the image, in the image's storage,
+    so they are shared and deleted with it like
+    ``ContentAddressedStorage`` variants.
+    """
+    return f'{variant_prefix(image_name)}{name}.{EXTENSIONS[image_format]}'
+
+
+def derivative_url(derivatives, name, request=None):
+    """Return the URL of a derivative, or None if it does not exist."""
+    derivative = (derivatives or {}).get(name)
+    if not derivative:
+        return None
+
+    storage = Project._meta.get_field('image').storage
+    url = storage.url(derivative['path'])
+    return request.build_absolute_uri(url) if request else url
+
+
+def render(image, size, image_format, quality):
+    """Return an image resized to fit ``size`` encoded in a format."""
+    resized = image.copy()
+    resized.thumbnail(size, Image.Resampling.LANCZOS)
+    if image_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    elif resized.mode == 'P':
+        resized = resized.convert('RGBA')
+
+    buffer = io.BytesIO()
+    resized.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue(), resized.size
+
+
+def generate_derivatives(project_id):
+    """Generate the configured derivatives of a project's image.
+
+    The result is only stored if the project still has the same image,
+    so a newer upload is never overwritten by a slower older one.
+    Returns the resulting image status, or None without an image.
+    """
+    project = Project.objects.filter(pk=project_id).only(
+        'id', 'user_id', 'image',
+    ).first()
+    if project is None or not project.image:
+        return None
+
+    image_name = project.image.name
+    storage = project.image.storage
+    derivatives = {}
+    try:
+        with project.image.open('rb') as image_file:
+            image = ImageOps.exif_transpose(Image.open(image_file))
+            for name, spec in settings.PROJECT_IMAGE_DERIVATIVES.items():
+                content, (width, height) = render(
+                    image, spec['size'], spec['format'],
+                    spec.get('quality', 85),
+                )
+                path = derivative_path(image_name, name, spec['format'])
+                # Projects sharing the image share its derivatives, which
+                # another job may be writing, so existing files are kept.
+                if not storage.exists(path):
+                    path = storage.save(path, ContentFile(content))
+                derivatives[name] = {
+                    'path': path,
+                    'width': width,
+                    'height': height,
+                }
+    except Exception:
+        logger.exception('Generating derivatives of project %s failed',
+                         project_id)
+        _store(project, image_name, {}, Project.IMAGE_FAILED)
+        return Project.IMAGE_FAILED
+
+    _store(project, image_name, derivatives, Project.IMAGE_READY)
+    return Project.IMAGE_READY
+
+
+def _store(project, image_name, derivatives, image_status):
+    """Record the derivatives if the project's image is unchanged."""
+    updated = Project.objects.filter(pk=project.pk, image=image_name).update(
+        image_derivatives=derivatives,
+        image_status=image_status,
+        modified_at=timezone.now(),
+    )
+    if updated:
+        bump_data_version(project.user_id)
+
+
+def schedule_derivatives(project):
+    """Arrange for the derivatives of a project's new image.
+
+    With ``PROJECT_IMAGE_DERIVATIVES_ASYNC`` they are generated by a
+    background job, queued with the transaction, otherwise before it
+    returns. An image shared with another project reuses that project's
+    derivatives.
+    """
+    shared = Project.objects.filter(
+        image=project.image.name,
+        image_status=Project.IMAGE_READY,
+    ).exclude(pk=project.pk).values_list('image_derivatives', flat=True)
+    derivatives = shared.first()
+    if derivatives is not None:
+        project.image_derivatives = derivatives
+        project.image_status = Project.IMAGE_READY
+        _store(project, project.image.name, derivatives, Project.IMAGE_READY)
+        return
+
+    if settings.PROJECT_IMAGE_DERIVATIVES_ASYNC:
+        jobs.enqueue('project.generate_image_derivatives',
+                     {'project_id': project.pk})
+    else:
+        transaction.on_commit(lambda: generate_derivatives(project.pk))
@@ -0,0 +1,372 @@
+"""
+Bulk import of projects with their tags and links.
+"""
+import csv
+import hashlib
+import io
+import json
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+
+from core.models import ImportRun, Project
+from core.signals import bump_data_version, deferred_version_bumps
+from project.serializers import (
+    ProjectSerializer,
+    link_key,
+    resolve_links,
+    resolve_tags,
+    tag_key,
+)
+
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportInProgress(Exception):
+    """Another import of the same file is running."""
+
+
+def file_checksum(fileobj, chunk_size=1024 * 1024):
+    """Return the SHA-256 of a binary file and rewind it."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+
+    return digest.hexdigest()
+
+
+def guess_format(filename):
+    """Return the import format matching a file name."""
+    return 'csv' if filename.lower().endswith('.csv') else 'ndjson'
+
+
+def iter_ndjson(lines):
+    """Yield one row per non-empty line, or None for malformed lines."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def iter_csv(lines):
+    """Yield rows of a CSV file in the export layout.
+
+    The ``tags`` and ``links`` columns hold JSON arrays. Rows with
+    malformed arrays are yielded as None.
+    """
+    for row in csv.DictReader(lines):
+        try:
+            for field in ('tags', 'links'):
+                row[field] = json.loads(row[field]) if row.get(field) else []
+        except ValueError:
+            row = None
+        yield row
+
+
+def parse_rows(textfile, import_format):
+    """Return an iterator over the rows of a text file."""
+    if import_format == 'csv':
+        return iter_csv(textfile)
+
+    return iter_ndjson(textfile)
+
+
+def _normalize(row):
+    """Accept tags given as plain names and drop exported IDs."""
+    row = dict(row)
+    row.pop('id', None)
+    row['tags'] = [
+        {'name': tag} if isinstance(tag, str) else tag
+        for tag in row.get('tags') or []
+    ]
+    row['links'] = row.get('links') or []
+    return row
+
+
+def _copy_value(value):
+    """Format a prepared database value for COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'adapted'):
+        value = value.dumps(value.adapted)
+
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def copy_insert(model, objs, set_pks=True):
+    """Insert objects with PostgreSQL COPY.
+
+    With ``set_pks`` the primary keys are reserved from the table
+    sequence up front, so the inserted rows can be referenced without
+    reading them back. Otherwise the database assigns them.
+    """
+    if not objs:
+        return objs
+
+    opts = model._meta
+    qn = connection.ops.quote_name
+    fields = [field for field in opts.local_concrete_fields
+              if set_pks or not field.primary_key]
+    with connection.cursor() as cursor:
+        if set_pks:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+                'FROM generate_series(1, %s)',
+                [opts.db_table, opts.pk.column, len(objs)],
+            )
+            for obj, (pk,) in zip(objs, cursor.fetchall()):
+                obj.pk = pk
+
+        buffer = io.StringIO()
+        for obj in objs:
+            buffer.write('\t'.join(
+                _copy_value(field.get_db_prep_save(
+                    field.pre_save(obj, add=True),
+                    connection,
+                ))
+                for field in fields
+            ) + '\n')
+        buffer.seek(0)
+        columns = ', '.join(qn(field.column) for field in fields)
+        cursor.copy_expert(
+            f'COPY {qn(opts.db_table)} ({columns}) FROM STDIN',
+            buffer,
+        )
+
+    return objs
+
+
+class ProjectImporter:
+    """Import projects for one user in batches.
+
+    Tags and links are deduplicated in memory for the whole import, so
+    each distinct tag or link is looked up once. Each batch is written
+    with bulk inserts (COPY on PostgreSQL) in its own transaction, which
+    also records the progress on the ``ImportRun``.
+    """
+
+    def __init__(self, user, batch_size=1000, use_copy=None):
+        self.user = user
+        self.batch_size = batch_size
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        self.use_copy = use_copy
+        self.validator = ProjectSerializer()
+        self.tag_ids = {}
+        self.link_ids = {}
+        self.errors = []
+
+    def _insert(self, model, objs, set_pks=True):
+        """Insert objects, setting their primary keys if asked to."""
+        if self.use_copy:
+            return copy_insert(model, objs, set_pks=set_pks)
+
+        return model.objects.bulk_create(objs)
+
+    def _resolve(self, cache, resolve, items, key):
+        """Fill the cache with the IDs of items not seen before."""
+        new = [item for item in items if key(item) not in cache]
+        if not new:
+            return
+
+        keys = list(dict.fromkeys(key(item) for item in new))
+        for item_key, obj in zip(keys, resolve(self.user, new)):
+            cache[item_key] = obj.id
+
+    def _validate(self, rows, first_row):
+        """Return validated rows, recording errors of the invalid ones."""
+        valid = []
+        for number, row in enumerate(rows, start=first_row):
+            try:
+                if row is None:
+                    raise ValidationError('Malformed row.')
+                valid.append(self.validator.run_validation(_normalize(row)))
+            except ValidationError as exc:
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({'row': number, 'errors': exc.detail})
+
+        return valid
+
+    def _write_batch(self, rows):
+        """Write validated rows and their tag and link assignments."""
+        tags = [tag for attrs in rows for tag in attrs.get('tags', [])]
+        links = [link for attrs in rows for link in attrs.get('links', [])]
+        self._resolve(self.tag_ids, resolve_tags, tags, tag_key)
+        self._resolve(self.link_ids, resolve_links, links, link_key)
+
+        projects = self._insert(Project, [
+            Project(
+                user=self.user,
+                **{k: v for k, v in attrs.items()
+                   if k not in ('tags', 'links')},
+            )
+            for attrs in rows
+        ])
+        tag_rows = dict.fromkeys(
+            (project.id, self.tag_ids[tag_key(tag)])
+            for project, attrs in zip(projects, rows)
+            for tag in attrs.get('tags', [])
+        )
+        link_rows = dict.fromkeys(
+            (project.id, self.link_ids[link_key(link)])
+            for project, attrs in zip(projects, rows)
+            for link in attrs.get('links', [])
+        )
+        self._insert(Project.tags.through, [
+            Project.tags.through(project_id=project_id, tag_id=tag_id)
+            for project_id, tag_id in tag_rows
+        ], set_pks=False)
+        self._insert(Project.links.through, [
+            Project.links.through(project_id=project_id, link_id=link_id)
+            for project_id, link_id in link_rows
+        ], set_pks=False)
+        bump_data_version(self.user.id)
+
+    def run(self, import_run, rows, on_batch=None):
+        """Import rows, skipping those committed by earlier attempts.
+
+        Returns a dict of statistics for this attempt. ``on_batch`` is
+        called with the import run and the statistics after each batch.
+        """
+        start = time.perf_counter()
+        stats = {'rows_imported': 0, 'rows_skipped': 0}
+        rows = islice(rows, import_run.rows_processed, None)
+        import_run.status = ImportRun.STATUS_RUNNING
+        import_run.save(update_fields=['status', 'modified_at'])
+        try:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                valid = self._validate(batch, import_run.rows_processed + 1)
+                with transaction.atomic(), deferred_version_bumps():
+                    if valid:
+                        self._write_batch(valid)
+                    import_run.rows_processed += len(batch)
+                    import_run.rows_imported += len(valid)
+                    import_run.rows_skipped += len(batch) - len(valid)
+                    import_run.save(update_fields=[
+                        'rows_processed', 'rows_imported', 'rows_skipped',
+                        'modified_at',
+                    ])
+                stats['rows_imported'] += len(valid)
+                stats['rows_skipped'] += len(batch) - len(valid)
+                if on_batch:
+                    on_batch(import_run, self._stats(stats, start))
+        except Exception as exc:
+            import_run.status = ImportRun.STATUS_FAILED
+            import_run.error = str(exc)
+            import_run.save(update_fields=['status', 'error', 'modified_at'])
+            raise
+
+        import_run.status = ImportRun.STATUS_COMPLETED
+        import_run.error = ''
+        import_run.save(update_fields=['status', 'error', 'modified_at'])
+
+        return self._stats(stats, start)
+
+    def _stats(self, stats, start):
+        """Return the statistics with timing information."""
+        seconds = time.perf_counter() - start
+        rows = stats['rows_imported'] + stats['rows_skipped']
+        return {
+            **stats,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds, 1) if seconds else 0,
+            'errors': self.errors,
+        }
+
+
+def claim_run(import_run, restart=False):
+    """Mark an import run as running unless another import runs it.
+
+    The conditional update is the lock, only one of concurrent imports
+    of a file can claim its run. Runs that made no progress for
+    ``IMPORT_STALE_TIMEOUT`` seconds are assumed lost with their process.
+    With ``restart`` completed runs are claimed too and the progress of
+    the claimed run is reset. Returns whether the run was claimed.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.IMPORT_STALE_TIMEOUT)
+    claimable = Q(status=ImportRun.STATUS_FAILED) | Q(
+        status=ImportRun.STATUS_RUNNING,
+        modified_at__lt=stale,
+    )
+    progress = {}
+    if restart:
+        claimable |= Q(status=ImportRun.STATUS_COMPLETED)
+        progress = {'rows_processed': 0, 'rows_imported': 0,
+                    'rows_skipped': 0, 'error': ''}
+    claimed = ImportRun.objects.filter(pk=import_run.pk).filter(
+        claimable,
+    ).update(status=ImportRun.STATUS_RUNNING, modified_at=now, **progress)
+    if claimed:
+        import_run.refresh_from_db()
+
+    return bool(claimed)
+
+
+def import_file(user, binary_file, source, import_format=None,
+                batch_size=1000, on_batch=None, restart=False):
+    """Import projects from a binary file object.
+
+    Re-importing a file with the same content resumes the earlier run
+    and does nothing if that run completed. With ``restart`` the file
+    is imported again from its first row instead, e.g. after the
+    imported projects were deleted. Raises ``ImportInProgress`` while
+    another import of the file is running. Returns the import run and
+    the statistics of this attempt.
+    """
+    import_format = import_format or guess_format(source)
+    checksum = file_checksum(binary_file)
+    import_run, created = ImportRun.objects.get_or_create(
+        user=user,
+        checksum=checksum,
+        defaults={'source': source[:255]},
+    )
+    importer = ProjectImporter(user, batch_size=batch_size)
+    if import_run.status == ImportRun.STATUS_COMPLETED and not restart:
+        return import_run, importer._stats(
+            {'rows_imported': 0, 'rows_skipped': 0},
+            time.perf_counter(),
+        )
+    if not created and not claim_run(import_run, restart=restart):
+        raise ImportInProgress(
+            f'Import run {import_run.id} of this file is still running.'
+        )
+
+    textfile = io.TextIOWrapper(binary_file, encoding='utf-8', newline='')
+    try:
+        stats = importer.run(
+            import_run,
+            parse_rows(textfile, import_format),
+            on_batch=on_batch,
+        )
+    finally:
+        textfile.detach()
+
+    return import_run, stats
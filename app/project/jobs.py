@@ -0,0 +1,15 @@
+"""
+Background job handlers of the project app.
+"""
+from core.jobs import register
+from core.models import Project
+from project import images
+
+
+@register('project.generate_image_derivatives')
+def generate_image_derivatives(project_id):
+    """Generate a project's image derivatives, failing to retry."""
+    if images.generate_derivatives(project_id) == Project.IMAGE_FAILED:
+        raise RuntimeError(
+            f'Generating derivatives of project {project_id} failed.'
+        )
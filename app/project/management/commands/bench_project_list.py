@@ -0,0 +1,101 @@
+"""
+Django command to benchmark serialization of the project list.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Link, Project, Tag
+from project.serializers import (
+    ProjectSerializer,
+    project_list_data,
+    project_list_values,
+)
+
+
+class Command(BaseCommand):
+    """Compare ProjectSerializer with the values() based fast path."""
+    help = 'Benchmark project list serialization (data is rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Numbers of projects to serialize.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per measurement, the best one is reported.',
+        )
+
+    def _seed(self, size):
+        """Create a user owning ``size`` projects with tags and links."""
+        user = get_user_model().objects.create_user(
+            email=f'bench-{time.time_ns()}@example.com',
+        )
+        tags = Tag.objects.bulk_create(
+            [Tag(user=user, name=f'Tag {i}') for i in range(20)]
+        )
+        links = Link.objects.bulk_create([
+            Link(user=user, text=f'Link {i}', href=f'https://example.com/{i}')
+            for i in range(10)
+        ])
+        projects = Project.objects.bulk_create([
+            Project(user=user, title=f'Project {i}', bodyText='Body ' * 40)
+            for i in range(size)
+        ], batch_size=5000)
+        Project.tags.through.objects.bulk_create([
+            Project.tags.through(project_id=p.id, tag_id=tags[(i + j) % 20].id)
+            for i, p in enumerate(projects) for j in range(3)
+        ], batch_size=5000)
+        Project.links.through.objects.bulk_create([
+            Project.links.through(project_id=p.id,
+                                  link_id=links[(i + j) % 10].id)
+            for i, p in enumerate(projects) for j in range(2)
+        ], batch_size=5000)
+
+        return user
+
+    def _best_of(self, repeat, func):
+        """Return the fastest run of func in seconds."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        renderer = JSONRenderer()
+        fields = set(ProjectSerializer.Meta.fields)
+        self.stdout.write(
+            f'{"projects":>10} {"serializer":>12} {"fast path":>12} '
+            f'{"speedup":>8}'
+        )
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = self._seed(size)
+                queryset = Project.objects.filter(user=user).order_by('-id')
+                slow = self._best_of(options['repeat'], lambda: (
+                    renderer.render(ProjectSerializer(
+                        queryset.prefetch_related('tags', 'links'),
+                        many=True,
+                    ).data)
+                ))
+                fast = self._best_of(options['repeat'], lambda: (
+                    renderer.render(project_list_data(
+                        queryset.values(*project_list_values(fields)),
+                        fields,
+                    ))
+                ))
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f'{size:>10} {slow:>11.3f}s {fast:>11.3f}s '
+                f'{slow / fast:>7.1f}x'
+            )
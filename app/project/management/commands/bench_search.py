@@ -0,0 +1,84 @@
+"""
+Django command to benchmark project search latency.
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Project
+from project.filters import search_projects
+
+
+NEEDLES = ('quokka', 'narwhal', 'axolotl', 'pangolin', 'okapi')
+
+
+class Command(BaseCommand):
+    """Measure search latency as the number of projects grows."""
+    help = 'Benchmark full-text project search (data is rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Numbers of projects to search.',
+        )
+        parser.add_argument(
+            '--queries', type=int, default=50,
+            help='Search queries per size, the median is reported.',
+        )
+        parser.add_argument(
+            '--matches', type=int, default=10,
+            help='Projects matching each query, independent of size.',
+        )
+
+    def _seed(self, size, matches):
+        """Create a user owning ``size`` projects with random text."""
+        rng = random.Random(size)
+        vocabulary = [f'word{i}' for i in range(5000)]
+        user = get_user_model().objects.create_user(
+            email=f'bench-{time.time_ns()}@example.com',
+        )
+        projects = [
+            Project(
+                user=user,
+                title=' '.join(rng.choices(vocabulary, k=4)),
+                bodyText=' '.join(rng.choices(vocabulary, k=60)),
+            )
+            for _ in range(size)
+        ]
+        for needle in NEEDLES:
+            for project in rng.sample(projects, min(matches, size)):
+                project.bodyText += f' {needle}'
+        Project.objects.bulk_create(projects, batch_size=5000)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_project')
+
+        return user
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write(f'Database: {connection.vendor}')
+        self.stdout.write(f'{"projects":>10} {"median":>10} {"p95":>10}')
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = self._seed(size, options['matches'])
+                queryset = Project.objects.filter(user=user)
+                timings = []
+                for i in range(options['queries']):
+                    needle = NEEDLES[i % len(NEEDLES)]
+                    start = time.perf_counter()
+                    list(search_projects(queryset, needle, ranked=True)
+                         .order_by('-rank', '-id')[:20])
+                    timings.append(time.perf_counter() - start)
+                transaction.set_rollback(True)
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f'{size:>10} {statistics.median(timings) * 1000:>8.2f}ms '
+                f'{p95 * 1000:>8.2f}ms'
+            )
@@ -0,0 +1,44 @@
+"""
+Django command to export a user's projects.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from project.exporters import EXPORT_FORMATS, export_projects
+
+
+class Command(BaseCommand):
+    """Stream a user's projects as NDJSON or CSV."""
+    help = "Export a user's projects with their tags and links."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export.')
+        parser.add_argument(
+            '--format', dest='export_format', choices=EXPORT_FORMATS,
+            default='ndjson',
+        )
+        parser.add_argument(
+            '--output', help='File to write to, defaults to stdout.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["email"]} does not exist.')
+
+        lines = export_projects(
+            user,
+            options['export_format'],
+            chunk_size=options['chunk_size'],
+        )
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
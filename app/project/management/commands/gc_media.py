@@ -0,0 +1,177 @@
+"""
+Django command to delete media files no project references.
+"""
+import os
+import time
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from core.models import Project, StoredFile
+
+
+class RateLimiter:
+    """Space calls evenly to at most ``rate`` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        """Sleep until the next call is allowed."""
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at = max(self.next_at, now) + self.interval
+
+
+def iter_files(root, prefix):
+    """Yield ``(name, size, mtime)`` for the files under a directory.
+
+    Directories are read one at a time and their files sorted by name,
+    so files sharing a stem are yielded next to each other.
+    """
+    directories = [prefix]
+    while directories:
+        directory = directories.pop()
+        try:
+            entries = list(os.scandir(os.path.join(root, directory)))
+        except FileNotFoundError:
+            continue
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            name = os.path.join(directory, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                directories.append(name)
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                yield name, stat.st_size, stat.st_mtime
+
+
+def stem_key(file):
+    """Return the directory and stem grouping a file with its variants."""
+    directory, filename = os.path.split(file[0])
+    return directory, filename.split('.', 1)[0]
+
+
+def iter_batches(files, batch_size):
+    """Yield lists of stem groups holding about ``batch_size`` files.
+
+    A stem group, an image with its derivatives, is never split.
+    """
+    batch, count = [], 0
+    for _, group in groupby(files, key=stem_key):
+        group = list(group)
+        batch.append(group)
+        count += len(group)
+        if count >= batch_size:
+            yield batch
+            batch, count = [], 0
+    if batch:
+        yield batch
+
+
+def derivative_names(prefix):
+    """Return the derivative paths under a prefix projects reference.
+
+    Derivatives generated before images were stored by content live
+    apart from their image, so only the project's JSON refers to them.
+    """
+    names = set()
+    derivatives = Project.objects.exclude(image_derivatives={}).values_list(
+        'image_derivatives', flat=True,
+    )
+    for derivative_map in derivatives.iterator():
+        names.update(
+            derivative['path'] for derivative in derivative_map.values()
+            if derivative and derivative['path'].startswith(prefix)
+        )
+
+    return names
+
+
+def referenced_names(names):
+    """Return the names referenced by a project or a stored file."""
+    return set(Project.objects.filter(image__in=names).values_list(
+        'image', flat=True,
+    )) | set(StoredFile.objects.filter(name__in=names).values_list(
+        'name', flat=True,
+    ))
+
+
+class Command(BaseCommand):
+    """Find and delete unreferenced project media files."""
+    help = (
+        'Delete project images and derivatives that no project references. '
+        'Run rehome_media first when images use the old flat layout.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the files that would be deleted.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--rate', type=float, default=50,
+            help='Maximum deletions per second, 0 for no limit.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files modified less than this many seconds ago.',
+        )
+        parser.add_argument('--path', default=os.path.join('uploads',
+                                                           'project'))
+
+    def _delete(self, storage, name, limiter):
+        """Delete a file and its directory if it is left empty."""
+        limiter.wait()
+        storage.delete(name)
+        try:
+            os.rmdir(os.path.dirname(storage.path(name)))
+        except OSError:
+            pass
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        storage = Project._meta.get_field('image').storage
+        limiter = RateLimiter(options['rate'])
+        cutoff = time.time() - options['min_age']
+        stats = dict.fromkeys(
+            ('files', 'bytes', 'orphans', 'recent', 'reclaimed'), 0,
+        )
+        start = time.perf_counter()
+
+        # Loaded once, derivatives referenced later are new files kept
+        # by --min-age.
+        derivatives = derivative_names(options['path'])
+        files = iter_files(storage.location, options['path'])
+        for batch in iter_batches(files, options['batch_size']):
+            referenced = referenced_names(
+                [name for group in batch for name, _, _ in group]
+            )
+            for group in batch:
+                stats['files'] += len(group)
+                stats['bytes'] += sum(size for _, size, _ in group)
+                if any(name in referenced or name in derivatives
+                       for name, _, _ in group):
+                    continue
+                for name, size, mtime in group:
+                    if mtime > cutoff:
+                        stats['recent'] += 1
+                        continue
+                    stats['orphans'] += 1
+                    stats['reclaimed'] += size
+                    if options['dry_run']:
+                        self.stdout.write(f'Would delete {name}')
+                    else:
+                        self._delete(storage, name, limiter)
+
+        verb = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {stats["files"]} files ({stats["bytes"]} bytes) in '
+            f'{time.perf_counter() - start:.1f}s. {verb} '
+            f'{stats["reclaimed"]} bytes from {stats["orphans"]} '
+            f'unreferenced files, kept {stats["recent"]} recent ones.'
+        ))
@@ -0,0 +1,35 @@
+"""
+Django command to generate missing project image derivatives.
+"""
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from core.models import Project
+from project.images import generate_derivatives
+
+
+class Command(BaseCommand):
+    """Generate derivatives of images uploaded without them."""
+    help = 'Generate the image derivatives of projects missing them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regenerate derivatives of every project image.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        projects = Project.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            projects = projects.exclude(image_status=Project.IMAGE_READY)
+
+        results = Counter(
+            generate_derivatives(project_id)
+            for project_id in projects.values_list('id', flat=True).iterator()
+        )
+        self.stdout.write(
+            f'{results[Project.IMAGE_READY]} generated, '
+            f'{results[Project.IMAGE_FAILED]} failed.'
+        )
@@ -0,0 +1,66 @@
+"""
+Django command to import projects from a file.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from project.importers import IMPORT_FORMATS, ImportInProgress, import_file
+
+
+class Command(BaseCommand):
+    """Import NDJSON or CSV projects for a user in batches."""
+    help = (
+        'Import projects with their tags and links. Running the command '
+        'again on the same file resumes after the last committed batch, '
+        'or with --restart imports it again from the start.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the owner.')
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--format', dest='import_format', choices=IMPORT_FORMATS,
+            help='File format, guessed from the extension by default.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Import the file again even if it was imported before.',
+        )
+
+    def _report(self, import_run, stats):
+        """Print the progress after a committed batch."""
+        self.stdout.write(
+            f'{import_run.rows_processed} rows committed '
+            f'({stats["rows_per_second"]} rows/s)'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["email"]} does not exist.')
+
+        with open(options['path'], 'rb') as binary_file:
+            try:
+                import_run, stats = import_file(
+                    user,
+                    binary_file,
+                    options['path'],
+                    import_format=options['import_format'],
+                    batch_size=options['batch_size'],
+                    on_batch=self._report,
+                    restart=options['restart'],
+                )
+            except ImportInProgress as exc:
+                raise CommandError(str(exc))
+
+        for error in stats['errors']:
+            self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["rows_imported"]} projects, skipped '
+            f'{stats["rows_skipped"]} rows in {stats["seconds"]}s '
+            f'({stats["rows_per_second"]} rows/s). '
+            f'Total for this file: {import_run.rows_imported}.'
+        ))
@@ -0,0 +1,119 @@
+"""
+Django command to move project images to the content addressed layout.
+"""
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Project, StoredFile
+from core.signals import bump_data_version, deferred_version_bumps
+from core.storage import file_digest, sharded_name, variant_prefix
+
+
+SHARDED_IMAGE_RE = (
+    r'^uploads/project/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[^/]*)?$'
+)
+
+
+class Command(BaseCommand):
+    """Rehome project images stored with the flat UUID layout."""
+    help = (
+        'Move project images to the sharded content addressed layout in '
+        'batches, deduplicating identical images. Safe to run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the images that would be moved.',
+        )
+
+    def _copy(self, storage, old_name, new_name):
+        """Copy a stored file, returning whether the target was new."""
+        if storage.exists(new_name):
+            return False
+        with storage.open(old_name) as f:
+            storage.save(new_name, File(f))
+        return True
+
+    def _rehome(self, project, stats):
+        """Copy a project's files, returning the names to delete."""
+        storage = project.image.storage
+        old_name = project.image.name
+        if not storage.exists(old_name):
+            stats['missing'] += 1
+            return None
+
+        with storage.open(old_name) as f:
+            digest = file_digest(File(f))
+        ext = os.path.splitext(old_name)[1].lower()
+        new_name = sharded_name(os.path.join('uploads', 'project'), digest,
+                                ext)
+        if not self._copy(storage, old_name, new_name):
+            stats['deduplicated'] += 1
+
+        old_names = [old_name]
+        for name, derivative in project.image_derivatives.items():
+            path = (f'{variant_prefix(new_name)}{name}'
+                    f'{os.path.splitext(derivative["path"])[1]}')
+            if storage.exists(derivative['path']):
+                self._copy(storage, derivative['path'], path)
+                old_names.append(derivative['path'])
+            derivative['path'] = path
+
+        project.image.name = new_name
+        project.modified_at = timezone.now()
+        return old_names
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        projects = Project.objects.exclude(image='').exclude(
+            image__isnull=True,
+        ).exclude(image__regex=SHARDED_IMAGE_RE).only(
+            'id', 'user_id', 'image', 'image_derivatives', 'modified_at',
+        ).order_by('id')
+        if options['dry_run']:
+            self.stdout.write(f'{projects.count()} images to rehome.')
+            return
+
+        stats = {'rehomed': 0, 'deduplicated': 0, 'missing': 0}
+        last_id = 0
+        while True:
+            batch = list(projects.filter(id__gt=last_id)[
+                :options['batch_size']
+            ])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            moved = []
+            for project in batch:
+                old_names = self._rehome(project, stats)
+                if old_names is not None:
+                    moved.append((project, old_names))
+            with transaction.atomic(), deferred_version_bumps():
+                Project.objects.bulk_update(
+                    [project for project, _ in moved],
+                    ['image', 'image_derivatives', 'modified_at'],
+                )
+                for project, _ in moved:
+                    StoredFile.objects.acquire(project.image.name)
+                    bump_data_version(project.user_id)
+
+            storage = Project._meta.get_field('image').storage
+            for project, old_names in moved:
+                if not Project.objects.filter(image=old_names[0]).exists():
+                    for name in old_names:
+                        storage.delete(name)
+            stats['rehomed'] += len(moved)
+            self.stdout.write(f'{stats["rehomed"]} images rehomed')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rehomed {stats["rehomed"]} images, '
+            f'{stats["deduplicated"]} deduplicated, '
+            f'{stats["missing"]} missing.'
+        ))
@@ -0,0 +1,27 @@
+"""
+Pagination for the project API.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class ProjectCursorPagination(CursorPagination):
+    """Opt-in keyset pagination for projects ordered by newest first.
+
+    Pages are selected with ``id < position`` (or ``>`` going backwards)
+    so the cost of a page does not depend on how deep into the list it
+    is. Pagination is only applied when the client sends a ``cursor`` or
+    ``page_size`` parameter, otherwise the full list is returned.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate only when the client asked for it."""
+        params = request.query_params
+        if (self.cursor_query_param not in params
+                and self.page_size_query_param not in params):
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
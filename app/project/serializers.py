@@ -1,9 +1,151 @@
 """
 Serializers for the project API View.
 """
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+from django.db.models.functions import Lower
+from django.utils import timezone
+
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from core.models import Project, StoredFile, Tag, Link, hash_href
+from core.signals import bump_data_version, deferred_version_bumps
+from project import images
+
+
+def tag_key(tag):
+    """Return the identity of validated tag data.
+
+    Tag names are unique per user regardless of case.
+    """
+    return tag['name'].lower()
+
+
+def link_key(link):
+    """Return the identity of validated link data.
+
+    Links are unique per user by text and normalized href.
+    """
+    return (link['text'], hash_href(link['href']))
+
+
+def _upsert(model, select, keys, key, build):
+    """Return the objects for the given keys, inserting the missing ones.
+
+    ``select`` returns a queryset of the objects matching some keys. The
+    common case where every object exists costs one query. Missing
+    objects are inserted with ``ON CONFLICT DO NOTHING``, so concurrent
+    requests creating the same object do not fail, and are read back.
+    """
+    found = {key(obj): obj for obj in select(keys)}
+    missing = [item_key for item_key in keys if item_key not in found]
+    if missing:
+        model.objects.bulk_create(
+            [build(item_key) for item_key in missing],
+            ignore_conflicts=True,
+        )
+        found.update((key(obj), obj) for obj in select(missing))
+
+    return [found[item_key] for item_key in keys]
+
+
+def resolve_tags(user, tags):
+    """Return the user's tags for the given tag data, creating missing ones.
+
+    Tags are matched case-insensitively and keep the case they were first
+    created with. The result is aligned with the distinct ``tag_key`` of
+    the data.
+    """
+    names = {}
+    for tag in tags:
+        names.setdefault(tag_key(tag), tag['name'])
+    if not names:
+        return []
+
+    def select(keys):
+        # Lower the names with the database's LOWER, the one the unique
+        # index uses. It can differ from str.lower() for non-ASCII names,
+        # so rows are mapped back to the keys by the value it computed.
+        lowered = {key: Lower(Value(names[key])) for key in keys}
+        return Tag.objects.annotate(lower_name=Lower('name')).filter(
+            user=user,
+            lower_name__in=list(lowered.values()),
+        ).annotate(key=Case(
+            *(When(lower_name=value, then=Value(key))
+              for key, value in lowered.items()),
+            output_field=CharField(),
+        ))
+
+    return _upsert(
+        Tag,
+        select,
+        list(names),
+        lambda tag: tag.key,
+        lambda key: Tag(user=user, name=names[key]),
+    )
+
+
+def resolve_links(user, links):
+    """Return the user's links for the given link data, creating missing ones.
+
+    Links are matched by text and normalized href. Like ``resolve_tags``
+    the result is aligned with the distinct ``link_key`` of the data.
+    """
+    hrefs = {}
+    for link in links:
+        hrefs.setdefault(link_key(link), link['href'])
+    if not hrefs:
+        return []
+
+    return _upsert(
+        Link,
+        lambda keys: Link.objects.filter(
+            user=user,
+            href_hash__in={href_hash for _, href_hash in keys},
+            text__in={text for text, _ in keys},
+        ),
+        list(hrefs),
+        lambda link: (link.text, link.href_hash),
+        lambda key: Link(user=user, text=key[0], href=hrefs[key]),
+    )
+
+
+def _replace_related(user, projects, field, items_per_project):
+    """Replace a relation on many projects with bulk SQL.
 
-from core.models import Project, Tag, Link
+    ``items_per_project`` holds the validated items for each project, or
+    None to leave that project's relation untouched.
+    """
+    resolve, key = {
+        'tags': (resolve_tags, tag_key),
+        'links': (resolve_links, link_key),
+    }[field]
+    changed = [
+        (project, items) for project, items
+        in zip(projects, items_per_project) if items is not None
+    ]
+    if not changed:
+        return
+
+    m2m = Project._meta.get_field(field)
+    through = m2m.remote_field.through
+    target = f'{m2m.m2m_reverse_field_name()}_id'
+    through.objects.filter(
+        project_id__in=[project.id for project, _ in changed]
+    ).delete()
+
+    items = [item for _, items in changed for item in items]
+    keys = list(dict.fromkeys(key(item) for item in items))
+    resolved = dict(zip(keys, resolve(user, items)))
+    rows = dict.fromkeys(
+        (project.id, resolved[key(item)].id)
+        for project, items in changed for item in items
+    )
+    through.objects.bulk_create([
+        through(project_id=project_id, **{target: obj_id})
+        for project_id, obj_id in rows
+    ])
 
 
 class LinkSerializer(serializers.ModelSerializer):
@@ -14,6 +156,25 @@ class LinkSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'href')
         read_only_fields = ('id',)
 
+    def validate(self, attrs):
+        """Reject editing a link into a duplicate of another one."""
+        if self.parent is None and self.instance is not None:
+            key = link_key({
+                'text': attrs.get('text', self.instance.text),
+                'href': attrs.get('href', self.instance.href),
+            })
+            duplicates = Link.objects.filter(
+                user=self.instance.user,
+                text=key[0],
+                href_hash=key[1],
+            ).exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(
+                    'A link with this text and URL already exists.'
+                )
+
+        return attrs
+
 
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for the tags."""
@@ -23,37 +184,151 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name')
         read_only_fields = ('id',)
 
+    def validate_name(self, value):
+        """Reject renaming a tag to the name of another one."""
+        if self.parent is None and self.instance is not None:
+            duplicates = Tag.objects.annotate(
+                lower_name=Lower('name'),
+            ).filter(
+                user=self.instance.user,
+                lower_name=Lower(Value(value)),
+            ).exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(
+                    'A tag with this name already exists.'
+                )
+
+        return value
+
+
+class LinkUsageSerializer(LinkSerializer):
+    """Serializer for the links with the number of projects using them."""
+    project_count = serializers.IntegerField(read_only=True)
+
+    class Meta(LinkSerializer.Meta):
+        fields = LinkSerializer.Meta.fields + ('project_count',)
+
+
+class TagUsageSerializer(TagSerializer):
+    """Serializer for the tags with the number of projects using them."""
+    project_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('project_count',)
+
+
+class ProjectListSerializer(serializers.ListSerializer):
+    """Create and update many projects with bulk SQL."""
+
+    def _replace_tags_and_links(self, projects, tags, links):
+        """Replace the tags and links of many projects at once."""
+        user = self.context['request'].user
+        _replace_related(user, projects, 'tags', tags)
+        _replace_related(user, projects, 'links', links)
+        bump_data_version(user.id)
+
+    @transaction.atomic
+    @deferred_version_bumps()
+    def create(self, validated_data):
+        """Create all projects with one insert per table."""
+        tags = [attrs.pop('tags', []) for attrs in validated_data]
+        links = [attrs.pop('links', []) for attrs in validated_data]
+        projects = Project.objects.bulk_create(
+            [Project(**attrs) for attrs in validated_data]
+        )
+        self._replace_tags_and_links(projects, tags, links)
+
+        return projects
+
+    @transaction.atomic
+    @deferred_version_bumps()
+    def update(self, instances, validated_data):
+        """Update projects, matched to the data by position."""
+        tags = [attrs.pop('tags', None) for attrs in validated_data]
+        links = [attrs.pop('links', None) for attrs in validated_data]
+        fields = {'modified_at'}
+        now = timezone.now()
+        for instance, attrs in zip(instances, validated_data):
+            instance.modified_at = now
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+        if instances:
+            Project.objects.bulk_update(instances, fields)
+        self._replace_tags_and_links(instances, tags, links)
+
+        return instances
+
+
+class SparseFieldsMixin:
+    """Let clients choose fields with ``?fields=`` or ``?omit=``.
+
+    Selection only applies to reads, writes always return every field.
+    """
+    always_included = ('id',)
+
+    @classmethod
+    def selected_fields(cls, query_params):
+        """Return the names of the fields selected by the query params."""
+        available = cls.Meta.fields
+        selected = set(available)
+        for param in ('fields', 'omit'):
+            value = query_params.get(param)
+            if not value:
+                continue
+            names = {name.strip() for name in value.split(',')} - {''}
+            unknown = names - selected
+            if unknown:
+                raise serializers.ValidationError(
+                    {param: f'Unknown fields: {", ".join(sorted(unknown))}.'}
+                )
+            if param == 'fields':
+                selected = names
+            else:
+                selected -= names
 
-class ProjectSerializer(serializers.ModelSerializer):
+        return selected | set(cls.always_included)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        selected = self.selected_fields(request.query_params)
+        for name in set(self.fields) - selected:
+            self.fields.pop(name)
+
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the projects."""
     tags = TagSerializer(many=True, required=False)
     links = LinkSerializer(many=True, required=False)
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
-        fields = ("id", 'title', 'bodyText', 'tags', 'links')
+        fields = ("id", 'title', 'bodyText', 'tags', 'links', 'thumbnail')
         read_only_fields = ('id',)
+        list_serializer_class = ProjectListSerializer
+
+    def get_thumbnail(self, obj) -> str:
+        """Return the URL of the image thumbnail, if generated."""
+        return images.derivative_url(obj.image_derivatives, 'thumbnail',
+                                     self.context.get('request'))
 
     def _get_or_create_tags(self, tags, project):
         """Handle getting or creating tags as needed"""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag
-            )
-            project.tags.add(tag_obj)
+        project.tags.add(*resolve_tags(auth_user, tags))
 
     def _get_or_create_links(self, links, project):
         """Handle getting or creating links as needed"""
         auth_user = self.context['request'].user
-        for link in links:
-            link_obj, created = Link.objects.get_or_create(
-                user=auth_user,
-                **link
-            )
-            project.links.add(link_obj)
+        project.links.add(*resolve_links(auth_user, links))
 
+    @transaction.atomic
+    @deferred_version_bumps()
     def create(self, validated_data):
         """Create a new project."""
         tags = validated_data.pop('tags', [])
@@ -64,6 +339,8 @@ class ProjectSerializer(serializers.ModelSerializer):
 
         return project
 
+    @transaction.atomic
+    @deferred_version_bumps()
     def update(self, instance, validated_data):
         """Update a project."""
         tags = validated_data.pop('tags', None)
@@ -84,22 +361,174 @@ class ProjectSerializer(serializers.ModelSerializer):
         return instance
 
 
+def _group_related(project_ids, field, serializer_class):
+    """Return related items of the projects grouped by project ID.
+
+    Items are plain dicts with the nested serializer's fields, ordered
+    by ID like the prefetches used by ``ProjectViewSet``.
+    """
+    m2m = Project._meta.get_field(field)
+    target = m2m.m2m_reverse_field_name()
+    attrs = serializer_class.Meta.fields
+    rows = m2m.remote_field.through.objects.filter(
+        project_id__in=project_ids,
+    ).order_by(f'{target}_id').values_list(
+        'project_id',
+        *(f'{target}__{attr}' for attr in attrs),
+    )
+    grouped = {}
+    for project_id, *values in rows:
+        grouped.setdefault(project_id, []).append(dict(zip(attrs, values)))
+
+    return grouped
+
+
+# Columns the fast path reads to compute fields without a column.
+COMPUTED_FIELD_SOURCES = {'thumbnail': 'image_derivatives'}
+
+
+def project_list_values(fields):
+    """Return the ``values()`` names needed to build the given fields."""
+    return list(dict.fromkeys(
+        COMPUTED_FIELD_SOURCES.get(field, field) for field in fields
+        if field not in ('tags', 'links')
+    ))
+
+
+def project_list_data(rows, fields, request=None):
+    """Build ``ProjectSerializer`` output from ``values()`` rows.
+
+    This is a read-only fast path for lists: it avoids model instances
+    and nested serializers and loads tags and links as tuples with one
+    query each. The rows must hold the ``project_list_values`` of the
+    fields. The output must stay identical to ``ProjectSerializer``.
+    """
+    rows = list(rows)
+    ids = [row['id'] for row in rows]
+    related = {
+        field: _group_related(ids, field, serializer_class)
+        for field, serializer_class in (
+            ('tags', TagSerializer),
+            ('links', LinkSerializer),
+        )
+        if field in fields
+    }
+    order = [field for field in ProjectSerializer.Meta.fields
+             if field in fields]
+
+    def value(row, field):
+        if field in related:
+            return related[field].get(row['id'], [])
+        if field == 'thumbnail':
+            return images.derivative_url(row['image_derivatives'],
+                                         'thumbnail', request)
+        return row[field]
+
+    return [{field: value(row, field) for field in order} for row in rows]
+
+
 class ProjectDetailSerializer(ProjectSerializer):
     """Serializer for the project detail."""
+    image_srcset = serializers.SerializerMethodField()
+
     class Meta(ProjectSerializer.Meta):
-        fields = ProjectSerializer.Meta.fields + ('image',)
+        fields = ProjectSerializer.Meta.fields + (
+            'image', 'image_status', 'image_srcset',
+        )
+        read_only_fields = ('id', 'image_status')
+
+    def get_image_srcset(self, obj) -> dict:
+        """Return the URL and size of each image derivative by name."""
+        request = self.context.get('request')
+        return {
+            name: {
+                'url': images.derivative_url(obj.image_derivatives, name,
+                                             request),
+                'width': derivative['width'],
+                'height': derivative['height'],
+            }
+            for name, derivative in obj.image_derivatives.items()
+        }
+
+
+class ProjectSearchResultSerializer(ProjectSerializer):
+    """Serializer for ranked search results."""
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ('rank',)
 
 
 class ProjectImageSerializer(serializers.ModelSerializer):
-    """Serializer for uploading images to projects."""
+    """Serializer for uploading images to projects.
+
+    Identical images share one stored file, so the references of the
+    old and new image are updated with the project.
+    """
 
     class Meta:
         model = Project
-        fields = ('id', 'image')
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status')
+        read_only_fields = ('id', 'image_status')
         extra_kwargs = {
             'image': {
                 'required': True,
                 'allow_null': False
             }
         }
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Replace the image of a project."""
+        old_name = instance.image.name if instance.image else None
+        instance = super().update(instance, validated_data)
+        if instance.image.name != old_name:
+            StoredFile.objects.acquire(instance.image.name)
+            if old_name:
+                StoredFile.objects.release(old_name)
+
+        return instance
+
+
+class ProjectBulkOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a bulk project request."""
+    OPERATIONS = ('create', 'update', 'delete')
+
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        """Check the fields required by the operation are present."""
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': 'This field is required.'}
+            )
+        if attrs['op'] != 'delete' and 'data' not in attrs:
+            raise serializers.ValidationError(
+                {'data': 'This field is required.'}
+            )
+
+        return attrs
+
+
+class ProjectBulkResultSerializer(serializers.Serializer):
+    """Serializer for the outcome of one bulk operation."""
+    index = serializers.IntegerField()
+    op = serializers.CharField()
+    id = serializers.IntegerField(allow_null=True)
+    status = serializers.IntegerField()
+    errors = serializers.JSONField(required=False)
+
+
+class ProjectImportSerializer(serializers.Serializer):
+    """Serializer for uploading a file of projects to import."""
+    file = serializers.FileField()
+    format = serializers.ChoiceField(
+        choices=('ndjson', 'csv'),
+        required=False,
+    )
+    restart = serializers.BooleanField(
+        default=False,
+        help_text='Import the file again even if it was imported before.',
+    )
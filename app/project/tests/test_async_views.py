@@ -0,0 +1,175 @@
+"""
+Tests for the async GET views of the project API.
+"""
+import asyncio
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import async_views as core_async_views
+from core.authentication import CachedTokenAuthentication
+from core.models import Project, Tag, Link
+from project import async_views, urls as project_urls
+from project.views import ProjectViewSet
+
+
+urlpatterns = [
+    path('api/health-check/', core_async_views.health_check,
+         name='health-check'),
+    path('api/project/', include(
+        (async_views.urlpatterns + project_urls.urlpatterns, 'project'),
+    )),
+]
+
+PROJECTS_URL = '/api/project/projects/'
+TAGS_URL = '/api/project/tags/'
+LINKS_URL = '/api/project/links/'
+
+
+def detail_url(project_id):
+    """Create and return a project detail URL."""
+    return f'{PROJECTS_URL}{project_id}/'
+
+
+class AsyncViewTests(TestCase):
+    """Test the async views answer like the sync ones."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        for i in range(3):
+            project = Project.objects.create(user=self.user,
+                                             title=f'Project {i}',
+                                             bodyText='Body')
+            project.tags.add(Tag.objects.create(user=self.user,
+                                                name=f'Tag {i}'))
+            project.links.add(Link.objects.create(
+                user=self.user, text=f'Link {i}',
+                href=f'http://example.com/{i}',
+            ))
+        self.project = project
+
+    def get_both(self, url, **extra):
+        """Return the sync and the async response to a GET request."""
+        sync = self.client.get(url, **extra)
+        with override_settings(ROOT_URLCONF=__name__):
+            asynchronous = self.client.get(url, **extra)
+        return sync, asynchronous
+
+    def assertSameResponse(self, url, **extra):
+        sync, asynchronous = self.get_both(url, **extra)
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(asynchronous.content, sync.content)
+        for header in ('ETag', 'Last-Modified', 'Content-Type'):
+            self.assertEqual(asynchronous.get(header), sync.get(header))
+        return asynchronous
+
+    def test_routes_to_async_views(self):
+        """Test the test URLs resolve to the async views."""
+        with override_settings(ROOT_URLCONF=__name__):
+            self.assertEqual(reverse('project:project-list'), PROJECTS_URL)
+
+    def test_project_list(self):
+        """Test listing projects, with and without options."""
+        for url in (PROJECTS_URL,
+                    f'{PROJECTS_URL}?fields=title,tags',
+                    f'{PROJECTS_URL}?page_size=2',
+                    f'{PROJECTS_URL}?omit=unknown'):
+            self.assertSameResponse(url)
+
+    @override_settings(PROJECT_LIST_FAST_PATH=True)
+    def test_project_list_fast_path(self):
+        """Test the fast list path is used by the async view too."""
+        self.assertSameResponse(f'{PROJECTS_URL}?omit=bodyText')
+
+    def test_project_list_not_modified(self):
+        """Test conditional requests are answered with 304."""
+        res = self.assertSameResponse(PROJECTS_URL)
+
+        with override_settings(ROOT_URLCONF=__name__):
+            res = self.client.get(PROJECTS_URL,
+                                  HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_project_detail(self):
+        """Test retrieving projects, including missing ones."""
+        for url in (detail_url(self.project.id),
+                    f'{detail_url(self.project.id)}?fields=title',
+                    detail_url(0),
+                    detail_url('abc')):
+            self.assertSameResponse(url)
+
+    def test_project_attr_lists(self):
+        """Test listing tags and links."""
+        for url in (TAGS_URL,
+                    f'{TAGS_URL}?assigned_only=1&with_counts=1',
+                    f'{TAGS_URL}?assigned_only=2',
+                    LINKS_URL):
+            self.assertSameResponse(url)
+
+    def test_auth_required(self):
+        """Test unauthenticated and bad token requests are refused."""
+        self.client.credentials()
+        self.assertSameResponse(PROJECTS_URL)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token wrong')
+        res = self.assertSameResponse(PROJECTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+    def test_sync_authenticators_used(self):
+        """Test authenticators without aauthenticate still authenticate."""
+        with patch.object(CachedTokenAuthentication, 'aauthenticate', None):
+            res = self.assertSameResponse(PROJECTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_initial_runs_off_event_loop(self):
+        """Test permission and throttle checks do not block the loop."""
+        initial = ProjectViewSet.initial
+        loops = []
+
+        def recording_initial(view, request, *args, **kwargs):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return initial(view, request, *args, **kwargs)
+
+        with patch.object(ProjectViewSet, 'initial', recording_initial), \
+                override_settings(ROOT_URLCONF=__name__):
+            res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(loops, [None])
+
+    def test_other_methods_use_sync_views(self):
+        """Test writes to async routes reach the sync viewset."""
+        with override_settings(ROOT_URLCONF=__name__):
+            res = self.client.post(PROJECTS_URL, {'title': 'New'})
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+            res = self.client.delete(detail_url(self.project.id))
+            self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_health_check(self):
+        """Test the async health check."""
+        res = self.client.get('/api/health-check/')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {'healthy': True})
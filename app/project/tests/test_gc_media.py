@@ -0,0 +1,100 @@
+"""
+Tests for the media garbage collector.
+"""
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Project, StoredFile
+from core.storage import content_addressed_storage
+
+
+def write_file(root, name, content=b'data', age=86400):
+    """Write a media file last modified ``age`` seconds ago."""
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class GcMediaTests(TestCase):
+    """Test deleting unreferenced media files."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        user = get_user_model().objects.create_user('user@example.com',
+                                                    'testpass123')
+        self.kept = [
+            write_file(self.root, 'uploads/project/aa/bb/aabb.jpg'),
+            write_file(self.root, 'uploads/project/aa/bb/aabb.thumbnail.jpg'),
+            write_file(self.root, 'uploads/project/cc/dd/ccdd.png'),
+            write_file(self.root, 'uploads/project/ee/ff/eeff.jpg', age=0),
+            write_file(self.root,
+                       'uploads/project/derivatives/old-photo/thumbnail.jpg'),
+        ]
+        self.orphans = [
+            write_file(self.root, 'uploads/project/aa/bb/aabc.jpg', b'12345'),
+            write_file(self.root, 'uploads/project/aa/bb/aabc.webp', b'123'),
+            write_file(self.root, 'uploads/project/old-uuid.jpg', b'12'),
+        ]
+        Project.objects.create(user=user, title='P',
+                               image='uploads/project/aa/bb/aabb.jpg')
+        StoredFile.objects.create(name='uploads/project/cc/dd/ccdd.png',
+                                  references=1)
+        Project.objects.create(
+            user=user, title='Legacy', image='uploads/project/old-photo.jpg',
+            image_derivatives={'thumbnail': {
+                'path': 'uploads/project/derivatives/old-photo/thumbnail.jpg',
+                'width': 160,
+                'height': 120,
+            }},
+        )
+
+    def test_dry_run(self):
+        """Test a dry run reports orphans without deleting them."""
+        out = io.StringIO()
+
+        call_command('gc_media', dry_run=True, stdout=out)
+
+        self.assertIn('Would reclaim 10 bytes from 3 unreferenced files',
+                      out.getvalue())
+        self.assertIn('Would delete uploads/project/old-uuid.jpg',
+                      out.getvalue())
+        for path in self.kept + self.orphans:
+            self.assertTrue(os.path.exists(path))
+
+    def test_delete_orphans(self):
+        """Test unreferenced files are deleted in small batches."""
+        out = io.StringIO()
+
+        call_command('gc_media', batch_size=1, rate=0, stdout=out)
+
+        self.assertIn('Reclaimed 10 bytes from 3 unreferenced files, '
+                      'kept 1 recent ones', out.getvalue())
+        for path in self.kept:
+            self.assertTrue(os.path.exists(path))
+        for path in self.orphans:
+            self.assertFalse(os.path.exists(path))
+
+    def test_reuploaded_file_kept(self):
+        """Test saving an existing old file again marks it as recent."""
+        name = 'uploads/project/aa/bb/aabc.jpg'
+        content_addressed_storage().save(name, ContentFile(b'12345'))
+
+        call_command('gc_media', rate=0, stdout=io.StringIO())
+
+        self.assertTrue(os.path.exists(os.path.join(self.root, name)))
@@ -0,0 +1,304 @@
+"""
+Tests for importing projects.
+"""
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ImportRun, Link, Project, Tag
+from project.exporters import export_projects
+from project.importers import (
+    ImportInProgress,
+    ProjectImporter,
+    file_checksum,
+    import_file,
+)
+
+
+IMPORT_URL = reverse('project:project-import-file')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def ndjson(rows):
+    """Return rows encoded as an NDJSON file object."""
+    return io.BytesIO(''.join(json.dumps(row) + '\n' for row in rows).encode())
+
+
+def sample_rows(count):
+    """Return project rows sharing a few tags and links."""
+    return [
+        {
+            'title': f'Project {i}',
+            'bodyText': f'Body {i}',
+            'tags': [{'name': f'Tag {i % 3}'}, 'Shared'],
+            'links': [{'text': 'Docs', 'href': f'http://example.com/{i % 2}'}],
+        }
+        for i in range(count)
+    ]
+
+
+def without_ids(user):
+    """Return the exported projects of a user with IDs removed."""
+    projects = [json.loads(line) for line in export_projects(user, 'ndjson')]
+    for project in projects:
+        del project['id']
+        for item in project['tags'] + project['links']:
+            del item['id']
+    return projects
+
+
+class ImportTests(TestCase):
+    """Test the project import pipeline."""
+
+    def setUp(self):
+        self.user = create_user()
+
+    def test_import_ndjson(self):
+        """Test projects, tags and links are imported and deduplicated."""
+        existing = Tag.objects.create(user=self.user, name='Shared')
+
+        import_run, stats = import_file(self.user, ndjson(sample_rows(7)),
+                                        'projects.ndjson', batch_size=3)
+
+        self.assertEqual(import_run.status, ImportRun.STATUS_COMPLETED)
+        self.assertEqual(stats['rows_imported'], 7)
+        self.assertEqual(Project.objects.filter(user=self.user).count(), 7)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Link.objects.filter(user=self.user).count(), 2)
+        project = Project.objects.get(title='Project 4')
+        self.assertEqual(
+            sorted(project.tags.values_list('name', flat=True)),
+            ['Shared', 'Tag 1'],
+        )
+        self.assertIn(existing, project.tags.all())
+        self.assertEqual(project.links.get().href, 'http://example.com/0')
+
+    def test_import_csv_export_round_trip(self):
+        """Test a CSV export can be imported for another user."""
+        import_file(self.user, ndjson(sample_rows(4)), 'projects.ndjson')
+        exported = ''.join(export_projects(self.user, 'csv')).encode()
+        other = create_user(email='other@example.com')
+
+        import_run, stats = import_file(other, io.BytesIO(exported),
+                                        'projects.csv')
+
+        self.assertEqual(stats['rows_imported'], 4)
+        self.assertEqual(without_ids(other), without_ids(self.user))
+
+    def test_invalid_rows_skipped(self):
+        """Test invalid rows are reported and the others imported."""
+        rows = io.BytesIO(
+            b'{"title": "Good"}\n'
+            b'not json\n'
+            b'{"bodyText": "No title"}\n'
+            b'{"title": "Bad link", "links": [{"text": "x", "href": "no"}]}\n'
+        )
+
+        import_run, stats = import_file(self.user, rows, 'projects.ndjson')
+
+        self.assertEqual(stats['rows_imported'], 1)
+        self.assertEqual(stats['rows_skipped'], 3)
+        self.assertEqual([e['row'] for e in stats['errors']], [2, 3, 4])
+        self.assertEqual(import_run.rows_processed, 4)
+
+    def test_resume_after_failure(self):
+        """Test a failed import resumes after the last committed batch."""
+        data = ndjson(sample_rows(6)).getvalue()
+        write_batch = ProjectImporter._write_batch
+        calls = []
+
+        def failing_write_batch(importer, rows):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise RuntimeError('Connection lost')
+            return write_batch(importer, rows)
+
+        with patch.object(ProjectImporter, '_write_batch',
+                          failing_write_batch):
+            with self.assertRaises(RuntimeError):
+                import_file(self.user, io.BytesIO(data), 'projects.ndjson',
+                            batch_size=2)
+
+        import_run = ImportRun.objects.get(user=self.user)
+        self.assertEqual(import_run.status, ImportRun.STATUS_FAILED)
+        self.assertEqual(import_run.rows_processed, 2)
+
+        import_run, stats = import_file(self.user, io.BytesIO(data),
+                                        'projects.ndjson', batch_size=2)
+
+        self.assertEqual(import_run.status, ImportRun.STATUS_COMPLETED)
+        self.assertEqual(stats['rows_imported'], 4)
+        self.assertEqual(
+            sorted(Project.objects.values_list('title', flat=True)),
+            [f'Project {i}' for i in range(6)],
+        )
+
+    def test_completed_import_not_repeated(self):
+        """Test importing the same file twice imports it once."""
+        data = ndjson(sample_rows(2)).getvalue()
+        import_file(self.user, io.BytesIO(data), 'projects.ndjson')
+
+        import_run, stats = import_file(self.user, io.BytesIO(data),
+                                        'copy.ndjson')
+
+        self.assertEqual(stats['rows_imported'], 0)
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_restart_completed_import(self):
+        """Test a completed import can be restarted from the start."""
+        data = ndjson(sample_rows(2)).getvalue()
+        first_run, _ = import_file(self.user, io.BytesIO(data),
+                                   'projects.ndjson')
+        Project.objects.filter(user=self.user).delete()
+
+        import_run, stats = import_file(self.user, io.BytesIO(data),
+                                        'projects.ndjson', restart=True)
+
+        self.assertEqual(import_run.pk, first_run.pk)
+        self.assertEqual(import_run.status, ImportRun.STATUS_COMPLETED)
+        self.assertEqual(stats['rows_imported'], 2)
+        self.assertEqual(import_run.rows_processed, 2)
+        self.assertEqual(import_run.rows_imported, 2)
+        self.assertEqual(Project.objects.filter(user=self.user).count(), 2)
+
+    def test_restart_refused_while_running(self):
+        """Test restarting does not take over a running import."""
+        data = ndjson(sample_rows(2)).getvalue()
+        ImportRun.objects.create(
+            user=self.user,
+            source='projects.ndjson',
+            checksum=file_checksum(io.BytesIO(data)),
+        )
+
+        with self.assertRaises(ImportInProgress):
+            import_file(self.user, io.BytesIO(data), 'projects.ndjson',
+                        restart=True)
+        self.assertEqual(Project.objects.count(), 0)
+
+    def test_running_import_not_repeated(self):
+        """Test a file is not imported while its import is running."""
+        data = ndjson(sample_rows(2)).getvalue()
+        import_run = ImportRun.objects.create(
+            user=self.user,
+            source='projects.ndjson',
+            checksum=file_checksum(io.BytesIO(data)),
+        )
+
+        with self.assertRaises(ImportInProgress):
+            import_file(self.user, io.BytesIO(data), 'projects.ndjson')
+        self.assertEqual(Project.objects.count(), 0)
+
+        ImportRun.objects.filter(pk=import_run.pk).update(
+            modified_at=timezone.now() - timedelta(hours=1),
+        )
+        import_run, stats = import_file(self.user, io.BytesIO(data),
+                                        'projects.ndjson')
+
+        self.assertEqual(import_run.status, ImportRun.STATUS_COMPLETED)
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_import_command(self):
+        """Test importing a file with the management command."""
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as f:
+            f.write(ndjson(sample_rows(3)).getvalue())
+            f.flush()
+            out = io.StringIO()
+            call_command('import_projects', self.user.email, f.name,
+                         stdout=out)
+
+        self.assertIn('Imported 3 projects', out.getvalue())
+        self.assertEqual(Project.objects.filter(user=self.user).count(), 3)
+
+    def test_import_command_restart(self):
+        """Test the command imports a file again with --restart."""
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as f:
+            f.write(ndjson(sample_rows(3)).getvalue())
+            f.flush()
+            call_command('import_projects', self.user.email, f.name,
+                         stdout=io.StringIO())
+            out = io.StringIO()
+            call_command('import_projects', self.user.email, f.name,
+                         '--restart', stdout=out)
+
+        self.assertIn('Imported 3 projects', out.getvalue())
+        self.assertEqual(Project.objects.filter(user=self.user).count(), 6)
+
+
+class ImportApiTests(TestCase):
+    """Test the import upload endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        """Test uploading requires authentication."""
+        res = APIClient().post(IMPORT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_upload_import(self):
+        """Test importing an uploaded file."""
+        upload = SimpleUploadedFile('projects.ndjson',
+                                    ndjson(sample_rows(3)).getvalue())
+
+        res = self.client.post(IMPORT_URL, {'file': upload},
+                               format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], ImportRun.STATUS_COMPLETED)
+        self.assertEqual(res.data['rows_imported'], 3)
+        self.assertIn('rows_per_second', res.data)
+        self.assertEqual(Project.objects.filter(user=self.user).count(), 3)
+
+    def test_upload_restart(self):
+        """Test uploading with restart imports a completed file again."""
+        data = ndjson(sample_rows(3)).getvalue()
+        self.client.post(IMPORT_URL,
+                         {'file': SimpleUploadedFile('projects.ndjson', data)},
+                         format='multipart')
+        Project.objects.filter(user=self.user).delete()
+
+        res = self.client.post(
+            IMPORT_URL,
+            {'file': SimpleUploadedFile('projects.ndjson', data),
+             'restart': True},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['rows_imported'], 3)
+        self.assertEqual(Project.objects.filter(user=self.user).count(), 3)
+
+    def test_upload_while_running(self):
+        """Test uploading a file whose import is running is refused."""
+        data = ndjson(sample_rows(3)).getvalue()
+        ImportRun.objects.create(
+            user=self.user,
+            source='projects.ndjson',
+            checksum=file_checksum(io.BytesIO(data)),
+        )
+        upload = SimpleUploadedFile('projects.ndjson', data)
+
+        res = self.client.post(IMPORT_URL, {'file': upload},
+                               format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Project.objects.count(), 0)
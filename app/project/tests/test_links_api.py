@@ -95,6 +95,20 @@ class PrivateLinksApiTests(TestCase):
         self.assertEqual(link.text, payload['text'])
         self.assertEqual(link.href, payload['href'])
 
+    def test_update_to_existing_link_error(self):
+        """Test updating a link into a duplicate of another one fails."""
+        Link.objects.create(user=self.user, text='Docs',
+                            href='http://example.com/docs')
+        link = Link.objects.create(user=self.user, text='Docs',
+                                   href='http://example.com/other')
+
+        res = self.client.patch(detail_url(link.id),
+                                {'href': 'http://EXAMPLE.com/docs/'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        link.refresh_from_db()
+        self.assertEqual(link.href, 'http://example.com/other')
+
     def test_delete_link(self):
         """Test deleting a link."""
         link = Link.objects.create(user=self.user,
@@ -159,3 +173,36 @@ class PrivateLinksApiTests(TestCase):
         res = self.client.get(LINKS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_links_with_counts(self):
+        """Test listing links with the number of projects using them."""
+        link = Link.objects.create(user=self.user, text='Docs',
+                                   href='http://example.com')
+        Link.objects.create(user=self.user, text='Blog',
+                            href='http://example.com/blog')
+        for i in range(2):
+            project = Project.objects.create(user=self.user, title=f'P{i}')
+            project.links.add(link)
+
+        res = self.client.get(LINKS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(link['text'], link['project_count']) for link in res.data],
+            [('Docs', 2), ('Blog', 0)],
+        )
+
+    def test_links_not_modified(self):
+        """Test an unchanged link list is answered with 304."""
+        link = Link.objects.create(user=self.user,
+                                   text='Test link',
+                                   href='http://example.com')
+        etag = self.client.get(LINKS_URL)['ETag']
+
+        res = self.client.get(LINKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        link.delete()
+        res = self.client.get(LINKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
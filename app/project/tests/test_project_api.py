@@ -1,24 +1,43 @@
 """
 Tests for project API.
 """
+import csv
+import io
+import json
 import tempfile
 import os
+from unittest.mock import patch
 
+from asgiref.sync import sync_to_async
 from PIL import Image
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
-from core.models import Project, Tag, Link
+from core.models import Job, Project, StoredFile, Tag, Link
+from core.storage import ContentAddressedStorage
 
+from project.images import generate_derivatives
 from project.serializers import ProjectSerializer, ProjectDetailSerializer
+from project.views import ProjectViewSet
 
 
 PROJECTS_URL = reverse('project:project-list')
+BULK_URL = reverse('project:project-bulk')
+EXPORT_URL = reverse('project:project-export')
+SEARCH_URL = reverse('project:project-search')
 
 
 def detail_url(project_id):
@@ -48,6 +67,19 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
+def create_projects_with_attrs(user, count):
+    """Create projects that each carry a tag and a link."""
+    start = Project.objects.filter(user=user).count()
+    for i in range(start, start + count):
+        project = create_project(user=user, title=f'Project {i}')
+        project.tags.add(Tag.objects.create(user=user, name=f'Tag {i}'))
+        project.links.add(Link.objects.create(
+            user=user,
+            text=f'Link {i}',
+            href=f'http://example.com/{i}',
+        ))
+
+
 class PublicProjectApiTests(TestCase):
     """Test unauthenticated API requests."""
 
@@ -323,6 +355,55 @@ class PrivateProjectApiTests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_existing_tags_matched_case_insensitively(self):
+        """Test tags differing only in case reuse the existing tag."""
+        tag = Tag.objects.create(user=self.user, name='Python')
+        payload = {
+            'title': 'Sample Project',
+            'tags': [{'name': 'python'}, {'name': 'PYTHON'}],
+        }
+        res = self.client.post(PROJECTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        project = Project.objects.get(user=self.user)
+        self.assertEqual(list(project.tags.all()), [tag])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_non_ascii_tags(self):
+        """Test tags whose case folding differs between Python and SQL."""
+        payload = {
+            'title': 'Sample Project',
+            'tags': [{'name': 'Élan'}, {'name': 'ΟΔΟΣ'}],
+        }
+        res = self.client.post(PROJECTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        project = Project.objects.get(user=self.user)
+        self.assertCountEqual([tag.name for tag in project.tags.all()],
+                              ['Élan', 'ΟΔΟΣ'])
+
+        res = self.client.post(PROJECTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_existing_links_matched_by_normalized_href(self):
+        """Test equivalent URLs reuse the existing link."""
+        link = Link.objects.create(user=self.user, text='GitHub',
+                                   href='http://example.com/repo')
+        payload = {
+            'title': 'Sample Project',
+            'links': [
+                {'text': 'GitHub', 'href': 'HTTP://Example.com:80/repo/'},
+            ],
+        }
+        res = self.client.post(PROJECTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        project = Project.objects.get(user=self.user)
+        self.assertEqual(list(project.links.all()), [link])
+        self.assertEqual(Link.objects.filter(user=self.user).count(), 1)
+
     def test_create_link_on_update(self):
         """Test creating link when updating a project."""
         project = create_project(user=self.user)
@@ -414,6 +495,696 @@ class PrivateProjectApiTests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_all_tags(self):
+        """Test filtering projects carrying every listed tag."""
+        tag1 = Tag.objects.create(user=self.user, name='Python')
+        tag2 = Tag.objects.create(user=self.user, name='Django')
+        both = create_project(user=self.user, title='Both')
+        both.tags.add(tag1, tag2)
+        one = create_project(user=self.user, title='One')
+        one.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(PROJECTS_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in res.data], [both.id])
+
+    def test_filter_by_any_tags_no_duplicates(self):
+        """Test projects matching several tags are listed once."""
+        tag1 = Tag.objects.create(user=self.user, name='Python')
+        tag2 = Tag.objects.create(user=self.user, name='Django')
+        project = create_project(user=self.user)
+        project.tags.add(tag1, tag2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PROJECTS_URL,
+                                  {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual([p['id'] for p in res.data], [project.id])
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries).upper()
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_filter_invalid_params(self):
+        """Test invalid filter params return an error."""
+        res = self.client.get(PROJECTS_URL, {'tags': '1', 'match': 'some'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(PROJECTS_URL, {'tags': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProjectQueryCountTests(TestCase):
+    """Test the number of queries does not grow with result size."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def _count_queries(self, method, url, *args, **kwargs):
+        """Return the number of queries issued by a request."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = getattr(self.client, method)(url, *args, **kwargs)
+        self.assertLess(res.status_code, 300)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_constant(self):
+        """Test listing projects uses a fixed number of queries."""
+        create_projects_with_attrs(self.user, 2)
+        small = self._count_queries('get', PROJECTS_URL)
+
+        create_projects_with_attrs(self.user, 20)
+        large = self._count_queries('get', PROJECTS_URL)
+
+        self.assertEqual(small, large)
+
+    def test_filtered_list_query_count_constant(self):
+        """Test filtering projects uses a fixed number of queries."""
+        create_projects_with_attrs(self.user, 2)
+        tag_ids = ','.join(str(t.id) for t in Tag.objects.all())
+        small = self._count_queries('get', PROJECTS_URL, {'tags': tag_ids})
+
+        create_projects_with_attrs(self.user, 20)
+        tag_ids = ','.join(str(t.id) for t in Tag.objects.all())
+        large = self._count_queries('get', PROJECTS_URL, {'tags': tag_ids})
+
+        self.assertEqual(small, large)
+
+    def test_retrieve_and_update_query_count_constant(self):
+        """Test detail endpoints do not issue per-attribute queries."""
+        project = create_project(user=self.user)
+        for i in range(20):
+            project.tags.add(Tag.objects.create(user=self.user, name=str(i)))
+        url = detail_url(project.id)
+
+        retrieve = self._count_queries('get', url)
+        update = self._count_queries('patch', url, {'title': 'New'})
+
+        project.tags.clear()
+        self.assertEqual(retrieve, self._count_queries('get', url))
+        self.assertEqual(
+            update,
+            self._count_queries('patch', url, {'title': 'Newer'}),
+        )
+
+    def _attrs_payload(self, count):
+        """Return tags and links payload with the given number of items."""
+        return {
+            'tags': [{'name': f'Tag {i}'} for i in range(count)],
+            'links': [
+                {'text': f'Link {i}', 'href': f'http://example.com/{i}'}
+                for i in range(count)
+            ],
+        }
+
+    def test_create_with_attrs_query_count_constant(self):
+        """Test creating a project resolves tags and links in bulk."""
+        Tag.objects.create(user=self.user, name='Tag 0')
+        payload = {'title': 'Small', **self._attrs_payload(2)}
+        small = self._count_queries('post', PROJECTS_URL, payload,
+                                    format='json')
+
+        payload = {'title': 'Large', **self._attrs_payload(30)}
+        large = self._count_queries('post', PROJECTS_URL, payload,
+                                    format='json')
+
+        self.assertEqual(small, large)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 30)
+        self.assertEqual(Link.objects.filter(user=self.user).count(), 30)
+        project = Project.objects.get(title='Large')
+        self.assertEqual(project.tags.count(), 30)
+        self.assertEqual(project.links.count(), 30)
+
+    def test_update_with_attrs_query_count_constant(self):
+        """Test updating a project resolves tags and links in bulk."""
+        project = create_project(user=self.user)
+        url = detail_url(project.id)
+        small = self._count_queries('patch', url, self._attrs_payload(2),
+                                    format='json')
+        large = self._count_queries('patch', url, self._attrs_payload(30),
+                                    format='json')
+
+        self.assertEqual(small, large)
+        self.assertEqual(project.tags.count(), 30)
+        self.assertEqual(project.links.count(), 30)
+
+
+class ProjectPaginationTests(TestCase):
+    """Test cursor pagination of the project list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.projects = [
+            create_project(user=self.user, title=f'Project {i}')
+            for i in range(5)
+        ]
+
+    def test_unpaginated_by_default(self):
+        """Test the list is a plain array without pagination params."""
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+
+    def test_walk_pages_forward_and_back(self):
+        """Test following next and previous cursors."""
+        res = self.client.get(PROJECTS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['previous'])
+        seen = [p['id'] for p in res.data['results']]
+        pages = [res]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(p['id'] for p in res.data['results'])
+            pages.append(res)
+
+        expected = sorted((p.id for p in self.projects), reverse=True)
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        back = self.client.get(pages[-1].data['previous'])
+        self.assertEqual(back.data['results'], pages[-2].data['results'])
+
+    def test_pagination_never_uses_offset(self):
+        """Test deep pages are fetched by key rather than offset."""
+        res = self.client.get(PROJECTS_URL, {'page_size': 2})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(res.data['next'])
+
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries).upper()
+        self.assertNotIn('OFFSET', sql)
+
+    def test_pagination_with_tag_filter(self):
+        """Test filters apply to paginated results."""
+        tag = Tag.objects.create(user=self.user, name='Python')
+        for project in self.projects[:3]:
+            project.tags.add(tag)
+
+        res = self.client.get(PROJECTS_URL, {'tags': tag.id, 'page_size': 2})
+        ids = [p['id'] for p in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids.extend(p['id'] for p in res.data['results'])
+
+        self.assertEqual(ids, [p.id for p in reversed(self.projects[:3])])
+        self.assertIsNone(res.data['next'])
+
+
+class SparseFieldsTests(TestCase):
+    """Test selecting project fields with query params."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        create_projects_with_attrs(self.user, 2)
+
+    def test_select_fields(self):
+        """Test only the requested fields are returned."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PROJECTS_URL, {'fields': 'title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data[0]), {'id', 'title'})
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('bodyText', sql)
+        self.assertNotIn('core_tag', sql)
+        self.assertNotIn('core_link', sql)
+
+    def test_omit_fields(self):
+        """Test omitted fields are left out of list and detail."""
+        res = self.client.get(PROJECTS_URL,
+                              {'omit': 'bodyText,links,thumbnail'})
+
+        self.assertEqual(set(res.data[0]), {'id', 'title', 'tags'})
+        self.assertEqual(len(res.data[0]['tags']), 1)
+
+        project = Project.objects.filter(user=self.user).first()
+        res = self.client.get(detail_url(project.id),
+                              {'omit': 'image,image_status,image_srcset'})
+
+        self.assertEqual(set(res.data),
+                         {'id', 'title', 'bodyText', 'tags', 'links',
+                          'thumbnail'})
+
+    def test_unknown_field_error(self):
+        """Test unknown field names are rejected."""
+        res = self.client.get(PROJECTS_URL, {'fields': 'title,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fields_ignored_on_write(self):
+        """Test write responses always contain every field."""
+        res = self.client.post(f'{PROJECTS_URL}?fields=id',
+                               {'title': 'New'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn('title', res.data)
+
+
+class FastListTests(TestCase):
+    """Test the values() based fast path of the project list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        create_projects_with_attrs(self.user, 3)
+        project = create_project(user=self.user, title='No attrs')
+        shared = Tag.objects.create(user=self.user, name='Shared')
+        for p in Project.objects.all():
+            p.tags.add(shared)
+        project.tags.remove(shared)
+
+    def _assert_identical(self, params, url=PROJECTS_URL):
+        """Assert both list implementations render the same bytes."""
+        with override_settings(PROJECT_LIST_FAST_PATH=False):
+            expected = self.client.get(url, params)
+        with override_settings(PROJECT_LIST_FAST_PATH=True):
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+
+    def test_output_identical(self):
+        """Test the fast path renders the serializer output."""
+        self._assert_identical({})
+
+    def test_output_identical_with_options(self):
+        """Test filters, field selection and pagination are honoured."""
+        tag = Tag.objects.get(name='Tag 1')
+        self._assert_identical({'fields': 'title,tags'})
+        self._assert_identical({'omit': 'tags'})
+        self._assert_identical({'tags': tag.id})
+        self._assert_identical({'page_size': 2})
+        next_url = self.client.get(PROJECTS_URL, {'page_size': 2}).data['next']
+        self._assert_identical({}, url=next_url)
+
+    def test_output_identical_with_thumbnails(self):
+        """Test thumbnail URLs are built like the serializer does."""
+        Project.objects.filter(title='Project 1').update(image_derivatives={
+            'thumbnail': {'path': 'uploads/project/derivatives/a/t.jpg',
+                          'width': 160, 'height': 90},
+        })
+
+        self._assert_identical({})
+        res = self.client.get(PROJECTS_URL, {'fields': 'title,thumbnail'})
+        thumbnails = {p['title']: p['thumbnail'] for p in res.data}
+        self.assertTrue(thumbnails['Project 1'].startswith('http://'))
+        self.assertIsNone(thumbnails['Project 0'])
+
+    @override_settings(PROJECT_LIST_FAST_PATH=True)
+    def test_query_count_constant(self):
+        """Test the fast path uses a fixed number of queries."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(PROJECTS_URL)
+        create_projects_with_attrs(self.user, 10)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(PROJECTS_URL)
+
+        self.assertEqual(len(small), len(large))
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling of project endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.project = create_project(user=self.user)
+
+    def test_list_not_modified(self):
+        """Test an unchanged list is answered with a single query."""
+        res = self.client.get(PROJECTS_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(PROJECTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_list_etag_changes_on_writes(self):
+        """Test project and tag assignment writes change the list ETag."""
+        etag = self.client.get(PROJECTS_URL)['ETag']
+        self.client.post(PROJECTS_URL, {'title': 'New'})
+        res = self.client.get(PROJECTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        etag = res['ETag']
+        self.project.tags.add(Tag.objects.create(user=self.user, name='T'))
+        res = self.client.get(PROJECTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        """Test different filters do not share an ETag."""
+        etag = self.client.get(PROJECTS_URL)['ETag']
+        res = self.client.get(PROJECTS_URL, {'page_size': 1},
+                              HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified(self):
+        """Test an unchanged project is answered with 304."""
+        url = detail_url(self.project.id)
+        res = self.client.get(url)
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(
+                url,
+                HTTP_IF_NONE_MATCH=res['ETag'],
+            )
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_within_second(self):
+        """Test If-Modified-Since does not hide a write in the same second."""
+        url = detail_url(self.project.id)
+        res = self.client.get(url)
+        self.client.patch(url, {'title': 'Changed'})
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Changed')
+
+    def test_detail_etag_changes_on_tag_rename(self):
+        """Test renaming a tag invalidates the projects using it."""
+        tag = Tag.objects.create(user=self.user, name='Python')
+        self.project.tags.add(tag)
+        url = detail_url(self.project.id)
+        etag = self.client.get(url)['ETag']
+
+        tag.name = 'Django'
+        tag.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Django')
+
+    def test_detail_other_user_not_found(self):
+        """Test conditional headers do not leak other users' projects."""
+        other = create_user(email='other@example.com', password='pass1234')
+        project = create_project(user=other)
+
+        res = self.client.get(detail_url(project.id), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SearchTests(TestCase):
+    """Test full-text search of projects."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.in_body = create_project(
+            user=self.user,
+            title='Portfolio site',
+            bodyText='Built with Django and PostgreSQL.',
+        )
+        self.in_title = create_project(
+            user=self.user,
+            title='Django REST API',
+            bodyText='An API for managing projects.',
+        )
+        create_project(user=self.user, title='Game', bodyText='Written in C.')
+        other = create_user(email='other@example.com', password='pass1234')
+        create_project(user=other, title='Django blog')
+
+    def test_list_search(self):
+        """Test filtering the project list with a search query."""
+        res = self.client.get(PROJECTS_URL, {'search': 'django'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(p['id'] for p in res.data),
+                         sorted([self.in_body.id, self.in_title.id]))
+
+    def test_list_search_all_words(self):
+        """Test every word of the query must match."""
+        res = self.client.get(PROJECTS_URL, {'search': 'django postgresql'})
+
+        self.assertEqual([p['id'] for p in res.data], [self.in_body.id])
+
+    def test_list_search_with_tag_filter(self):
+        """Test search combines with the related object filters."""
+        tag = Tag.objects.create(user=self.user, name='Web')
+        self.in_body.tags.add(tag)
+
+        res = self.client.get(PROJECTS_URL, {'search': 'django',
+                                             'tags': str(tag.id)})
+
+        self.assertEqual([p['id'] for p in res.data], [self.in_body.id])
+
+    def test_ranked_search(self):
+        """Test title matches rank above body matches."""
+        res = self.client.get(SEARCH_URL, {'q': 'django'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in res.data],
+                         [self.in_title.id, self.in_body.id])
+        self.assertGreater(res.data[0]['rank'], res.data[1]['rank'])
+
+    def test_ranked_search_limit(self):
+        """Test the number of ranked results can be limited."""
+        res = self.client.get(SEARCH_URL, {'q': 'django', 'limit': 1})
+
+        self.assertEqual([p['id'] for p in res.data], [self.in_title.id])
+
+    def test_ranked_search_requires_query(self):
+        """Test the ranked search needs a query."""
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportTests(TestCase):
+    """Test exporting projects."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        create_projects_with_attrs(self.user, 3)
+        other = create_user(email='other@example.com', password='pass1234')
+        create_project(user=other)
+
+    def _expected(self):
+        """Return the user's projects as the API serializes them.
+
+        Exports hold the project data only, not the image URLs.
+        """
+        projects = Project.objects.filter(user=self.user).order_by('id')
+        expected = json.loads(json.dumps(
+            ProjectSerializer(projects, many=True).data
+        ))
+        for project in expected:
+            del project['thumbnail']
+        return expected
+
+    def test_export_ndjson(self):
+        """Test exporting projects as streamed NDJSON."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         self._expected())
+
+    def test_export_csv(self):
+        """Test exporting projects as CSV."""
+        res = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        expected = self._expected()
+        self.assertEqual(len(rows), len(expected))
+        for row, project in zip(rows, expected):
+            self.assertEqual(int(row['id']), project['id'])
+            self.assertEqual(row['title'], project['title'])
+            self.assertEqual(json.loads(row['tags']), project['tags'])
+            self.assertEqual(json.loads(row['links']), project['links'])
+
+    async def test_export_streamed_under_asgi(self):
+        """Test ASGI exports stream from an async iterator."""
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await self.async_client.get(
+            EXPORT_URL, headers={'authorization': f'Token {token.key}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        content = b''.join([chunk async for chunk in res.streaming_content])
+        lines = content.decode().splitlines()
+        expected = await sync_to_async(self._expected)()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_invalid_format(self):
+        """Test unknown export formats are rejected."""
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command_chunks(self):
+        """Test the export command streams the same data in chunks."""
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as output:
+            call_command('export_projects', self.user.email,
+                         output=output.name, chunk_size=2)
+            with open(output.name) as f:
+                exported = [json.loads(line) for line in f]
+
+        self.assertEqual(exported, self._expected())
+
+
+class BulkProjectApiTests(TestCase):
+    """Test the bulk project API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_update_delete(self):
+        """Test applying a mix of operations in one request."""
+        tag = Tag.objects.create(user=self.user, name='Python')
+        to_update = create_project(user=self.user, title='Old title')
+        to_update.tags.add(tag)
+        to_delete = create_project(user=self.user)
+        payload = [
+            {'op': 'create', 'data': {
+                'title': 'New 1',
+                'tags': [{'name': 'Python'}, {'name': 'Go'}],
+                'links': [{'text': 'Docs', 'href': 'http://example.com'}],
+            }},
+            {'op': 'create', 'data': {'title': 'New 2',
+                                      'tags': [{'name': 'Go'}]}},
+            {'op': 'update', 'id': to_update.id,
+             'data': {'title': 'New title', 'tags': []}},
+            {'op': 'delete', 'id': to_delete.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in res.data],
+                         [201, 201, 200, 204])
+        new1 = Project.objects.get(id=res.data[0]['id'])
+        self.assertEqual(new1.user, self.user)
+        self.assertEqual(
+            sorted(new1.tags.values_list('name', flat=True)),
+            ['Go', 'Python'],
+        )
+        self.assertIn(tag, new1.tags.all())
+        self.assertEqual(new1.links.count(), 1)
+        new2 = Project.objects.get(id=res.data[1]['id'])
+        self.assertEqual(new2.tags.get().name, 'Go')
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        to_update.refresh_from_db()
+        self.assertEqual(to_update.title, 'New title')
+        self.assertEqual(to_update.tags.count(), 0)
+        self.assertFalse(Project.objects.filter(id=to_delete.id).exists())
+
+    def test_bulk_invalid_item_applies_nothing(self):
+        """Test one invalid operation rolls back the whole request."""
+        other_user = create_user(email='other@example.com',
+                                 password='testpass123')
+        other_project = create_project(user=other_user)
+        project = create_project(user=self.user)
+        payload = [
+            {'op': 'create', 'data': {'title': 'Valid'}},
+            {'op': 'create', 'data': {'bodyText': 'Missing title'}},
+            {'op': 'delete', 'id': project.id},
+            {'op': 'delete', 'id': other_project.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('errors', res.data[0])
+        self.assertIn('title', res.data[1]['errors'])
+        self.assertNotIn('errors', res.data[2])
+        self.assertEqual(res.data[3]['status'], status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Project.objects.filter(title='Valid').exists())
+        self.assertTrue(Project.objects.filter(id=project.id).exists())
+        self.assertTrue(Project.objects.filter(id=other_project.id).exists())
+
+    def test_bulk_rejects_repeated_project(self):
+        """Test a project can only be targeted by one operation."""
+        project = create_project(user=self.user)
+        payload = [
+            {'op': 'update', 'id': project.id, 'data': {'title': 'New'}},
+            {'op': 'delete', 'id': project.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Project.objects.filter(id=project.id).exists())
+
+    def test_bulk_create_id_not_counted(self):
+        """Test an id on a create does not clash with other operations."""
+        project = create_project(user=self.user)
+        payload = [
+            {'op': 'create', 'id': project.id, 'data': {'title': 'New'}},
+            {'op': 'delete', 'id': project.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in res.data], [201, 204])
+        self.assertFalse(Project.objects.filter(id=project.id).exists())
+
+    def test_bulk_limit_checked_before_validation(self):
+        """Test oversized batches are refused without validating items."""
+        payload = [{'op': 'create', 'data': {'title': f'Project {i}'}}
+                   for i in range(3)] + [{'op': 'unknown'}]
+
+        with patch.object(ProjectViewSet, 'bulk_max_operations', 3), \
+                self.assertNumQueries(0):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('At most 3 operations', res.data['detail'])
+
+    def test_bulk_create_query_count_constant(self):
+        """Test bulk creation cost does not grow with the item count."""
+        def payload(count):
+            return [
+                {'op': 'create', 'data': {
+                    'title': f'Project {i}',
+                    'tags': [{'name': f'Tag {i}'}, {'name': 'Shared'}],
+                }}
+                for i in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BULK_URL, payload(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BULK_URL, payload(50), format='json')
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Project.objects.count(), 52)
+
 
 class ImageUploadTests(TestCase):
     """Tests for the image upload API."""
@@ -428,7 +1199,20 @@ class ImageUploadTests(TestCase):
         self.project = create_project(user=self.user)
 
     def tearDown(self):
-        self.project.image.delete()
+        for project in Project.objects.exclude(image=''):
+            project.image.storage.delete_with_variants(project.image.name)
+
+    def _image_file(self, size=(10, 10)):
+        """Return an uploaded JPEG image of the given size."""
+        buffer = io.BytesIO()
+        Image.new('RGB', size).save(buffer, format='JPEG')
+        return SimpleUploadedFile('image.jpg', buffer.getvalue())
+
+    def _upload(self, size=(10, 10)):
+        """Upload a JPEG image of the given size to the project."""
+        return self.client.post(image_upload_url(self.project.id),
+                                {'image': self._image_file(size)},
+                                format='multipart')
 
     def test_upload_image(self):
         """Test uploading an image to a project."""
@@ -445,6 +1229,194 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.project.image.path))
 
+    def test_upload_queues_derivatives_job(self):
+        """Test the upload returns before derivatives are generated."""
+        res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Project.IMAGE_PENDING)
+        job = Job.objects.get()
+        self.assertEqual(job.job_type, 'project.generate_image_derivatives')
+        self.assertEqual(job.payload, {'project_id': self.project.id})
+
+        call_command('run_worker', burst=True, concurrency=1,
+                     stdout=io.StringIO())
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_status, Project.IMAGE_READY)
+        self.assertEqual(set(self.project.image_derivatives),
+                         set(settings.PROJECT_IMAGE_DERIVATIVES))
+
+    @override_settings(PROJECT_IMAGE_DERIVATIVES_ASYNC=False)
+    def test_upload_generates_derivatives(self):
+        """Test derivatives are generated and listed after an upload."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(1000, 500))
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_status, Project.IMAGE_READY)
+        thumbnail = self.project.image_derivatives['thumbnail']
+        self.assertEqual((thumbnail['width'], thumbnail['height']),
+                         (160, 80))
+        self.assertTrue(default_storage.exists(thumbnail['path']))
+        with default_storage.open(
+            self.project.image_derivatives['webp']['path']
+        ) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+
+        res = self.client.get(detail_url(self.project.id))
+
+        srcset = res.data['image_srcset']
+        self.assertEqual(set(srcset),
+                         set(settings.PROJECT_IMAGE_DERIVATIVES))
+        self.assertEqual(srcset['medium']['width'], 800)
+        self.assertTrue(srcset['medium']['url'].startswith('http://'))
+
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertTrue(res.data[0]['thumbnail'].endswith('thumbnail.jpg'))
+
+    @override_settings(PROJECT_IMAGE_DERIVATIVES_ASYNC=False)
+    def test_derivatives_use_image_storage(self):
+        """Test derivatives are kept in the storage of the image."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = ContentAddressedStorage(location=directory.name,
+                                          base_url='/images/')
+        field = Project._meta.get_field('image')
+
+        with patch.object(field, 'storage', storage):
+            with self.captureOnCommitCallbacks(execute=True):
+                self._upload()
+            self.project.refresh_from_db()
+            derivatives = self.project.image_derivatives
+            generate_derivatives(self.project.id)
+            res = self.client.get(detail_url(self.project.id))
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_derivatives, derivatives)
+        for derivative in derivatives.values():
+            self.assertTrue(storage.exists(derivative['path']))
+            self.assertFalse(default_storage.exists(derivative['path']))
+        self.assertTrue(
+            res.data['image_srcset']['medium']['url'].startswith(
+                'http://testserver/images/'
+            )
+        )
+
+    def test_derivatives_of_unreadable_image_fail(self):
+        """Test a broken image is marked as failed."""
+        self.project.image = 'uploads/project/missing.jpg'
+        self.project.save()
+
+        result = generate_derivatives(self.project.id)
+
+        self.assertEqual(result, Project.IMAGE_FAILED)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_status, Project.IMAGE_FAILED)
+
+    def test_generate_derivatives_command(self):
+        """Test the command backfills derivatives of existing images."""
+        with self.captureOnCommitCallbacks():
+            self._upload()
+        out = io.StringIO()
+
+        call_command('generate_image_derivatives', stdout=out)
+
+        self.assertIn('1 generated, 0 failed', out.getvalue())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.image_status, Project.IMAGE_READY)
+
+    @override_settings(PROJECT_IMAGE_DERIVATIVES_ASYNC=False)
+    def test_identical_images_stored_once(self):
+        """Test identical uploads share the file and its derivatives."""
+        other = create_project(user=self.user, title='Other')
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                image_upload_url(other.id),
+                {'image': self._image_file()},
+                format='multipart',
+            )
+
+        self.assertEqual(res.data['image_status'], Project.IMAGE_READY)
+        self.project.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(other.image.name, self.project.image.name)
+        self.assertRegex(self.project.image.name,
+                         r'^uploads/project/\w\w/\w\w/\w{64}\.jpg$')
+        self.assertEqual(other.image_derivatives,
+                         self.project.image_derivatives)
+        stored = StoredFile.objects.get(name=other.image.name)
+        self.assertEqual(stored.references, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertTrue(os.path.exists(self.project.image.path))
+
+        thumbnail = self.project.image_derivatives['thumbnail']['path']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        self.assertFalse(os.path.exists(self.project.image.path))
+        self.assertFalse(default_storage.exists(thumbnail))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_replaced_image_released(self):
+        """Test replacing an image deletes the unreferenced old one."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(10, 10))
+        self.project.refresh_from_db()
+        old_path = self.project.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(20, 20))
+
+        self.project.refresh_from_db()
+        self.assertNotEqual(self.project.image.path, old_path)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(
+            list(StoredFile.objects.values_list('name', flat=True)),
+            [self.project.image.name],
+        )
+
+    def test_rehome_media_command(self):
+        """Test flat images are moved to the sharded layout."""
+        storage = Project._meta.get_field('image').storage
+        flat_name = storage.save('uploads/project/old-uuid.JPG',
+                                 self._image_file())
+        thumbnail = storage.save('uploads/project/derivatives/old/t.jpg',
+                                 ContentFile(b'thumb'))
+        Project.objects.filter(pk=self.project.pk).update(
+            image=flat_name,
+            image_derivatives={
+                'thumbnail': {'path': thumbnail, 'width': 1, 'height': 1},
+            },
+        )
+        out = io.StringIO()
+
+        call_command('rehome_media', '--dry-run', stdout=out)
+        self.assertIn('1 images to rehome', out.getvalue())
+
+        call_command('rehome_media', batch_size=1, stdout=out)
+
+        self.assertIn('Rehomed 1 images', out.getvalue())
+        self.project.refresh_from_db()
+        self.assertRegex(self.project.image.name,
+                         r'^uploads/project/\w\w/\w\w/\w{64}\.jpg$')
+        new_thumbnail = self.project.image_derivatives['thumbnail']['path']
+        self.assertEqual(
+            new_thumbnail,
+            self.project.image.name[:-len('.jpg')] + '.thumbnail.jpg',
+        )
+        self.assertTrue(storage.exists(self.project.image.name))
+        self.assertTrue(storage.exists(new_thumbnail))
+        self.assertFalse(storage.exists(flat_name))
+        self.assertFalse(storage.exists(thumbnail))
+        self.assertTrue(
+            StoredFile.objects.filter(name=self.project.image.name).exists()
+        )
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image."""
         url = image_upload_url(self.project.id)
@@ -2,8 +2,10 @@
 Tests for the tags API.
 """
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -82,6 +84,27 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_to_existing_tag_error(self):
+        """Test renaming a tag to the name of another one fails."""
+        Tag.objects.create(user=self.user, name='Python')
+        tag = Tag.objects.create(user=self.user, name='Java')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'python'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Java')
+
+    def test_rename_tag_case(self):
+        """Test changing only the case of a tag name."""
+        tag = Tag.objects.create(user=self.user, name='python')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Python'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Python')
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='Python')
@@ -131,3 +154,71 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_assigned_only_without_join(self):
+        """Test assigned tags are filtered without a join or DISTINCT."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        sql = queries[-1]['sql'].upper()
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_invalid_flag_error(self):
+        """Test an invalid flag value returns an error."""
+        res = self.client.get(TAGS_URL, {'with_counts': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tags_with_counts(self):
+        """Test listing tags with the number of projects using them."""
+        python = Tag.objects.create(user=self.user, name='Python')
+        java = Tag.objects.create(user=self.user, name='Java')
+        Tag.objects.create(user=self.user, name='Go')
+        for i in range(3):
+            project = Project.objects.create(user=self.user, title=f'P{i}')
+            project.tags.add(python)
+            if i == 0:
+                project.tags.add(java)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['name'], tag['project_count']) for tag in res.data],
+            [('Python', 3), ('Java', 1), ('Go', 0)],
+        )
+        self.assertEqual(
+            len([q for q in queries if 'core_tag' in q['sql']]), 1,
+        )
+
+        res = self.client.get(TAGS_URL, {'with_counts': 1,
+                                         'assigned_only': 1})
+
+        self.assertEqual(
+            [(tag['name'], tag['project_count']) for tag in res.data],
+            [('Python', 3), ('Java', 1)],
+        )
+
+    def test_tags_without_counts(self):
+        """Test project counts are only listed when asked for."""
+        Tag.objects.create(user=self.user, name='Python')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertNotIn('project_count', res.data[0])
+
+    def test_tags_not_modified(self):
+        """Test an unchanged tag list is answered with 304."""
+        Tag.objects.create(user=self.user, name='Python')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.create(user=self.user, name='Java')
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
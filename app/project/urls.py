@@ -1,11 +1,12 @@
 """
 URL mappings for the user API
 """
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
-from project import views
+from project import async_views, views
 
 router = DefaultRouter()
 router.register('projects', views.ProjectViewSet)
@@ -17,3 +18,6 @@ app_name = 'project'
 urlpatterns = [
     path('', include(router.urls))
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_views.urlpatterns + urlpatterns
@@ -1,6 +1,17 @@
 """
 Views for the project API.
 """
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -9,17 +20,136 @@ from drf_spectacular.utils import (
 )
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+
+from core.authentication import CachedTokenAuthentication
+from core.models import DataVersion, Project, Tag, Link
+from core.routers import ReplicaReadMixin
+from core.signals import deferred_version_bumps
+from core.throttling import UserWriteThrottle
+from project import exporters, filters, images, importers, serializers
+from project.pagination import ProjectCursorPagination
+
+
+class ConditionalGetMixin:
+    """Answer list requests with 304 when nothing changed.
+
+    List responses are validated against the user's data version, which
+    is bumped on every project, tag or link write, so a revalidation
+    costs one primary key lookup.
+    """
+
+    def _make_etag(self, request, *parts):
+        """Return an ETag for the representation identified by parts."""
+        key = '|'.join(str(part) for part in (
+            request.user.pk,
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            *parts,
+        ))
+        return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+    def _not_modified(self, request, etag):
+        """Return a 304 response if the client copy is current.
+
+        Only the ETag is compared. Last-Modified has a resolution of one
+        second, so it would miss a second write within the same second.
+        """
+        return get_conditional_response(request, etag=etag)
+
+    def _add_validators(self, response, etag, modified_at):
+        """Set the caching headers of a full or 304 response."""
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(int(modified_at.timestamp()))
+        response['Cache-Control'] = 'private, no-cache'
+
+        return response
+
+    def _conditional(self, request, etag, modified_at, handler, *args,
+                     **kwargs):
+        """Return 304 if the client copy is current, else run handler."""
+        response = self._not_modified(request, etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        return self._add_validators(response, etag, modified_at)
+
+    async def _aconditional(self, request, etag, modified_at, handler,
+                            *args, **kwargs):
+        """Same as ``_conditional`` for a coroutine handler."""
+        response = self._not_modified(request, etag)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        return self._add_validators(response, etag, modified_at)
+
+    def list(self, request, *args, **kwargs):
+        """List objects, honouring conditional request headers."""
+        version = DataVersion.objects.current(request.user)
+        etag = self._make_etag(request, 'list', version.version)
+
+        return self._conditional(request, etag, version.modified_at,
+                                 super().list, *args, **kwargs)
+
+
+class FastListMixin:
+    """Serve project lists from ``values()`` rows when enabled.
+
+    Controlled by the ``PROJECT_LIST_FAST_PATH`` setting. The response
+    is the same as the one built by ``ProjectSerializer``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """List projects without instantiating models or serializers."""
+        if not settings.PROJECT_LIST_FAST_PATH:
+            return super().list(request, *args, **kwargs)
+
+        fields = self.get_serializer_class().selected_fields(
+            request.query_params
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(
+            *serializers.project_list_values(fields)
+        )
+        page = self.paginate_queryset(rows)
+        data = serializers.project_list_data(
+            rows if page is None else page,
+            fields,
+            request=request,
+        )
+        if page is not None:
+            return self.get_paginated_response(data)
 
-from core.models import Project, Tag, Link
-from project import serializers
+        return Response(data)
+
+
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return',
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out',
+    ),
+]
 
 
 @extend_schema_view(
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
     list=extend_schema(
-        parameters=[
+        parameters=SPARSE_FIELDS_PARAMETERS + [
             OpenApiParameter(
                 'tags',
                 OpenApiTypes.STR,
@@ -30,34 +160,74 @@ from project import serializers
                 OpenApiTypes.STR,
                 description='Comma separated list of link IDs to filter',
             ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=list(filters.MATCH_MODES),
+                description='Match any (default) or all of the listed IDs',
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full-text search on title and body',
+            ),
         ]
     )
 )
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ReplicaReadMixin,
+                     ConditionalGetMixin,
+                     FastListMixin,
+                     viewsets.ModelViewSet):
     """View for manage project APIs."""
     serializer_class = serializers.ProjectDetailSerializer
     queryset = Project.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    throttle_classes = [UserWriteThrottle]
+    throttle_scope = 'write'
     permission_classes = [IsAuthenticated]
-
-    def _params_to_ints(self, qs):
-        """Convert a list of string IDs to a list of integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+    pagination_class = ProjectCursorPagination
+    bulk_max_operations = 1000
 
     def get_queryset(self):
         """Retrieve projects for authenticated user."""
-        tags = self.request.query_params.get('tags')
-        links = self.request.query_params.get('links')
-        queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if links:
-            link_ids = self._params_to_ints(links)
-            queryset = queryset.filter(links__id__in=link_ids)
-
+        queryset = filters.filter_projects(
+            self.queryset,
+            self.request.query_params,
+        )
         queryset = queryset.filter(user=self.request.user).order_by('-id')
-        return queryset.distinct()
+        prefetches = {
+            'tags': Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            'links': Prefetch('links', queryset=Link.objects.order_by('id')),
+        }
+        if self.request.method not in SAFE_METHODS:
+            return queryset.prefetch_related(*prefetches.values())
+
+        selected = self.get_serializer_class().selected_fields(
+            self.request.query_params
+        )
+        if 'bodyText' not in selected:
+            queryset = queryset.defer('bodyText')
+        if not selected & {'thumbnail', 'image_srcset'}:
+            queryset = queryset.defer('image_derivatives')
+        return queryset.prefetch_related(
+            *(prefetches[field] for field in prefetches if field in selected)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a project, honouring conditional request headers."""
+        try:
+            modified_at = Project.objects.filter(
+                user=request.user,
+                pk=kwargs['pk'],
+            ).values_list('modified_at', flat=True).first()
+        except (TypeError, ValueError):
+            modified_at = None
+        if modified_at is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self._make_etag(request, 'detail', modified_at.isoformat())
+
+        return self._conditional(request, etag, modified_at,
+                                 super().retrieve, *args, **kwargs)
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -65,6 +235,12 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return serializers.ProjectSerializer
         elif self.action == 'upload_image':
             return serializers.ProjectImageSerializer
+        elif self.action == 'bulk':
+            return serializers.ProjectBulkOperationSerializer
+        elif self.action == 'import_file':
+            return serializers.ProjectImportSerializer
+        elif self.action == 'search':
+            return serializers.ProjectSearchResultSerializer
 
         return self.serializer_class
 
@@ -79,11 +255,204 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(project, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            project = serializer.save(
+                image_derivatives={},
+                image_status=Project.IMAGE_PENDING,
+            )
+            images.schedule_derivatives(project)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        parameters=SPARSE_FIELDS_PARAMETERS + [
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Full-text search query',
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description=f'Number of results, at most {SEARCH_MAX_LIMIT}',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False, url_path='search')
+    def search(self, request):
+        """Return the projects best matching a full-text search."""
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'q': 'This parameter is required.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_LIMIT))
+        except ValueError:
+            return Response({'limit': 'A valid integer is required.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = filters.search_projects(
+            self.get_queryset(),
+            text,
+            ranked=True,
+        ).order_by('-rank', '-id')[:max(1, min(limit, SEARCH_MAX_LIMIT))]
+        serializer = self.get_serializer(queryset, many=True)
+
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'output',
+                OpenApiTypes.STR, enum=list(exporters.EXPORT_FORMATS),
+                description='Export format, ndjson (default) or csv',
+            ),
+        ],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR,
+                   (200, 'text/csv'): OpenApiTypes.STR},
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream all projects of the user with their tags and links."""
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in exporters.EXPORT_FORMATS:
+            return Response(
+                {'output': 'Must be one of: '
+                           f'{", ".join(exporters.EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        lines = exporters.export_projects(request.user, export_format)
+        if isinstance(request._request, ASGIRequest):
+            lines = exporters.aiter_export(lines)
+        response = StreamingHttpResponse(
+            lines,
+            content_type=exporters.CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="projects.{export_format}"'
+        )
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='import',
+            parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """Import projects from an uploaded NDJSON or CSV file.
+
+        Uploading the same file again resumes an interrupted import,
+        or with ``restart`` imports it again from the start.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+
+        try:
+            import_run, stats = importers.import_file(
+                request.user,
+                upload.file,
+                upload.name,
+                import_format=serializer.validated_data.get('format'),
+                restart=serializer.validated_data['restart'],
+            )
+        except importers.ImportInProgress as exc:
+            return Response({'detail': str(exc)},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(
+            {'id': import_run.id, 'status': import_run.status, **stats},
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        request=serializers.ProjectBulkOperationSerializer(many=True),
+        responses=serializers.ProjectBulkResultSerializer(many=True),
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create, update and delete many projects in one transaction.
+
+        Either every operation is applied or, if any of them fails
+        validation, none are and the per-item errors are returned.
+        """
+        # Refuse oversized batches before validating any of them. Data
+        # that is not a list is rejected by the serializer.
+        if (isinstance(request.data, list)
+                and len(request.data) > self.bulk_max_operations):
+            return Response(
+                {'detail': f'At most {self.bulk_max_operations} '
+                           'operations are allowed per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        operations = self.get_serializer(data=request.data, many=True)
+        operations.is_valid(raise_exception=True)
+        operations = operations.validated_data
+
+        results = [
+            {'index': index, 'op': op['op'], 'id': op.get('id')}
+            for index, op in enumerate(operations)
+        ]
+        indexes = {name: [] for name in ('create', 'update', 'delete')}
+        for index, op in enumerate(operations):
+            indexes[op['op']].append(index)
+
+        ids = Counter(operations[index]['id']
+                      for index in indexes['update'] + indexes['delete'])
+        projects = Project.objects.filter(user=request.user).in_bulk(list(ids))
+        for index in indexes['update'] + indexes['delete']:
+            project_id = operations[index]['id']
+            if project_id not in projects:
+                results[index].update(status=status.HTTP_404_NOT_FOUND,
+                                      errors={'detail': 'Not found.'})
+            elif ids[project_id] > 1:
+                results[index].update(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    errors={'id': 'Project is used by another operation.'},
+                )
+        indexes['update'] = [i for i in indexes['update']
+                             if 'errors' not in results[i]]
+
+        context = self.get_serializer_context()
+        creates = serializers.ProjectSerializer(
+            data=[operations[i]['data'] for i in indexes['create']],
+            many=True,
+            context=context,
+        )
+        updates = serializers.ProjectSerializer(
+            [projects[operations[i]['id']] for i in indexes['update']],
+            data=[operations[i]['data'] for i in indexes['update']],
+            many=True,
+            partial=True,
+            context=context,
+        )
+        for serializer, op in ((creates, 'create'), (updates, 'update')):
+            if not serializer.is_valid():
+                for index, errors in zip(indexes[op], serializer.errors):
+                    if errors:
+                        results[index].update(
+                            status=status.HTTP_400_BAD_REQUEST,
+                            errors=errors,
+                        )
+        if any('errors' in result for result in results):
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(), deferred_version_bumps():
+            created = creates.save(user=request.user)
+            updates.save()
+            Project.objects.filter(
+                user=request.user,
+                id__in=[operations[i]['id'] for i in indexes['delete']],
+            ).delete()
+
+        for index, project in zip(indexes['create'], created):
+            results[index].update(id=project.id,
+                                  status=status.HTTP_201_CREATED)
+        for index in indexes['update']:
+            results[index]['status'] = status.HTTP_200_OK
+        for index in indexes['delete']:
+            results[index]['status'] = status.HTTP_204_NO_CONTENT
+
+        return Response(results, status=status.HTTP_200_OK)
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -93,51 +462,69 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to user',
             ),
+            OpenApiParameter(
+                'with_counts',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Include the number of projects using each item',
+            ),
         ]
     )
 )
-class BaseProjectAttrViewSet(mixins.DestroyModelMixin,
+class BaseProjectAttrViewSet(ReplicaReadMixin,
+                             ConditionalGetMixin,
+                             mixins.DestroyModelMixin,
                              mixins.UpdateModelMixin,
                              mixins.ListModelMixin,
                              viewsets.GenericViewSet):
     """Base viewset for project attributes."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    throttle_classes = [UserWriteThrottle]
+    throttle_scope = 'write'
     permission_classes = [IsAuthenticated]
+    # Name of the Project many-to-many field and the list ordering.
+    project_field = None
+    ordering = None
+    usage_serializer_class = None
+
+    def _with_counts(self):
+        """Return whether the list includes project counts."""
+        return self.action == 'list' and filters.param_to_bool(
+            self.request.query_params, 'with_counts',
+        )
+
+    def get_queryset(self):
+        """Retrieve objects for authenticated user."""
+        queryset = self.queryset.filter(user=self.request.user)
+        if filters.param_to_bool(self.request.query_params, 'assigned_only'):
+            queryset = filters.filter_assigned(queryset, self.project_field)
+        if self._with_counts():
+            queryset = filters.annotate_project_count(
+                queryset, self.project_field,
+            )
+
+        return queryset.order_by(self.ordering)
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self._with_counts():
+            return self.usage_serializer_class
+
+        return self.serializer_class
 
 
 class TagViewSet(BaseProjectAttrViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
+    usage_serializer_class = serializers.TagUsageSerializer
     queryset = Tag.objects.all()
-
-    def get_queryset(self):
-        """Retrieve tags for authenticated user."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-        # Start with the queryset filtered by the user
-        queryset = self.queryset.filter(user=self.request.user)
-        # Apply filter for assigned_only if specified
-        if assigned_only:
-            queryset = queryset.filter(project__isnull=False)
-        # Return the filtered queryset ordered by name and distinct
-        return queryset.order_by('-name').distinct()
+    project_field = 'tags'
+    ordering = '-name'
 
 
 class LinkViewSet(BaseProjectAttrViewSet):
     """Manage links in the database."""
     serializer_class = serializers.LinkSerializer
+    usage_serializer_class = serializers.LinkUsageSerializer
     queryset = Link.objects.all()
-
-    def get_queryset(self):
-        """Retrieve links for authenticated user."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-        # Start with the queryset filtered by the user
-        queryset = self.queryset.filter(user=self.request.user)
-        # Apply filter for assigned_only if specified
-        if assigned_only:
-            queryset = queryset.filter(project__isnull=False)
-        # Return the filtered queryset ordered by text and distinct
-        return queryset.order_by('-text').distinct()
+    project_field = 'links'
+    ordering = '-text'
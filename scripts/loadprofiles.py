@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Compare gunicorn profiles under the same load.
+
+Starts gunicorn with gunicorn.conf.py once per profile, runs the load of
+loadtest.py against it and prints throughput and latency per profile.
+Run it from the app directory against a migrated database, e.g.:
+
+    cd app
+    python ../scripts/loadprofiles.py --token <token> --slow-clients 20 \\
+        --env GUNICORN_WORKERS=4 --profiles sync,gthread,uvicorn
+
+Profiles are sets of environment variables, see PROFILES.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from loadtest import add_load_arguments, run_load
+
+
+PROFILES = {
+    'sync': {'GUNICORN_WORKER_CLASS': 'sync'},
+    'gthread': {'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_THREADS': '4'},
+    'gthread-8': {'GUNICORN_WORKER_CLASS': 'gthread',
+                  'GUNICORN_THREADS': '8'},
+    'uvicorn': {'GUNICORN_WORKER_CLASS': 'uvicorn', 'ASYNC_VIEWS': '1'},
+}
+
+
+def wait_until_ready(url, timeout):
+    """Wait for the server to answer the health check."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (URLError, OSError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server did not become ready within {timeout}s.')
+
+
+def run_profile(name, options):
+    """Start gunicorn with a profile, load it and return the results."""
+    env = {**os.environ, **dict(options.env), **PROFILES[name],
+           'GUNICORN_BIND': f'127.0.0.1:{options.port}'}
+    base = f'http://127.0.0.1:{options.port}'
+    server = subprocess.Popen(
+        ['gunicorn', '--config', 'gunicorn.conf.py'],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f'{base}/api/health-check/', options.start_timeout)
+        options.url = f'{base}{options.path}'
+        return asyncio.run(run_load(options))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def env_pair(value):
+    name, sep, setting = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError('Expected NAME=VALUE.')
+    return name, setting
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--profiles', default=','.join(PROFILES),
+                        help='Comma separated profile names.')
+    parser.add_argument('--path', default='/api/project/projects/')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--env', type=env_pair, action='append', default=[],
+                        help='NAME=VALUE set for every profile.')
+    parser.add_argument('--start-timeout', type=float, default=30)
+    add_load_arguments(parser)
+    options = parser.parse_args()
+    options.profiles = options.profiles.split(',')
+    unknown = set(options.profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f'Unknown profiles: {", ".join(sorted(unknown))}.')
+    return options
+
+
+def main():
+    options = parse_args()
+    print(f'{"profile":<12} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} '
+          f'{"errors":>7}')
+    for name in options.profiles:
+        result = run_profile(name, options)
+        p50, p99 = (f'{result[key]:8.1f}' if result[key] is not None
+                    else f'{"-":>8}' for key in ('p50', 'p99'))
+        print(f'{name:<12} {result["throughput"]:8.1f} {p50} {p99} '
+              f'{result["errors"]:7d}')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+Measure API latency while many slow clients hold connections open.
+
+Runs ``--concurrency`` clients sending GET requests back to back while
+``--slow-clients`` connections trickle their request headers, one line
+every ``--slow-interval`` seconds, like clients on bad networks or slow
+uploads. Sync workers are tied up by each slow connection, ASGI workers
+are not. Run it against each server mode and compare, e.g.:
+
+    SERVER_MODE=wsgi run.sh   # or SERVER_MODE=asgi
+    python scripts/loadtest.py --token <token> --slow-clients 50 \\
+        --url http://localhost:9000/api/project/projects/
+
+Only the standard library is used.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def open_connection(url):
+    """Open a connection to the host of a URL."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    return await asyncio.open_connection(parts.hostname, port,
+                                         ssl=parts.scheme == 'https')
+
+
+def request_head(url, headers):
+    """Return the request line and headers of a GET request."""
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += f'?{parts.query}'
+    return [f'GET {target} HTTP/1.1', f'Host: {parts.netloc}',
+            'Connection: close', *headers]
+
+
+async def fetch(url, headers, timeout):
+    """Send a GET request and return its status code."""
+    reader, writer = await open_connection(url)
+    try:
+        lines = request_head(url, headers)
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def fast_client(url, headers, deadline, timeout, results):
+    """Send requests back to back until the deadline."""
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            status = await fetch(url, headers, timeout)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            status = None
+        results.append((status, time.perf_counter() - start))
+
+
+async def slow_client(url, headers, deadline, interval):
+    """Hold a connection open by sending the request a line at a time."""
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await open_connection(url)
+        except OSError:
+            await asyncio.sleep(interval)
+            continue
+        try:
+            for line in request_head(url, headers):
+                writer.write(f'{line}\r\n'.encode())
+                await writer.drain()
+                await asyncio.sleep(interval)
+            count = 0
+            while time.monotonic() < deadline:
+                writer.write(f'X-Slow-{count}: 1\r\n'.encode())
+                await writer.drain()
+                count += 1
+                await asyncio.sleep(interval)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+def percentile(values, fraction):
+    """Return a percentile of sorted values."""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def run_load(options):
+    """Run the load described by the options and return its results."""
+    headers = []
+    if options.token:
+        headers.append(f'Authorization: Token {options.token}')
+    results = []
+    slow_deadline = time.monotonic() + options.warmup + options.duration
+    slow = [
+        asyncio.create_task(slow_client(options.url, headers, slow_deadline,
+                                        options.slow_interval))
+        for _ in range(options.slow_clients)
+    ]
+    await asyncio.sleep(options.warmup)
+
+    deadline = time.monotonic() + options.duration
+    await asyncio.gather(*(
+        fast_client(options.url, headers, deadline, options.timeout, results)
+        for _ in range(options.concurrency)
+    ))
+    for task in slow:
+        task.cancel()
+    await asyncio.gather(*slow, return_exceptions=True)
+
+    latencies = sorted(seconds * 1000 for status, seconds in results
+                       if status is not None and status < 400)
+    return {
+        'requests': len(results),
+        'errors': len(results) - len(latencies),
+        'throughput': len(latencies) / options.duration,
+        'p50': statistics.median(latencies) if latencies else None,
+        'p95': percentile(latencies, 0.95) if latencies else None,
+        'p99': percentile(latencies, 0.99) if latencies else None,
+        'max': latencies[-1] if latencies else None,
+    }
+
+
+async def main(options):
+    result = await run_load(options)
+    print(f'{options.slow_clients} slow clients, '
+          f'{options.concurrency} concurrent requests')
+    print(f'requests: {result["requests"]}, errors: {result["errors"]}, '
+          f'throughput: {result["throughput"]:.1f} req/s')
+    if result['p50'] is not None:
+        print(f'latency ms: p50 {result["p50"]:.1f}, '
+              f'p95 {result["p95"]:.1f}, p99 {result["p99"]:.1f}, '
+              f'max {result["max"]:.1f}')
+
+
+def add_load_arguments(parser):
+    """Add the options of ``run_load`` to an argument parser."""
+    parser.add_argument('--token', help='API token for authenticated URLs.')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--slow-clients', type=int, default=50)
+    parser.add_argument('--slow-interval', type=float, default=5,
+                        help='Seconds between lines sent by slow clients.')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=2,
+                        help='Seconds for slow clients to connect first.')
+    parser.add_argument('--timeout', type=float, default=30)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--url', required=True)
+    add_load_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
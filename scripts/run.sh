@@ -2,8 +2,21 @@
 
 set -e
 
-python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Waits for the database, then runs collectstatic, cache_schema and
+# migrate in one process, skipping the steps with nothing to do.
+python manage.py prepare_start
 
-gunicorn --bind :9000 --workers 4 app.wsgi
+# SERVER_MODE=asgi runs uvicorn workers, which keep serving while clients
+# send or read slowly, and turns on the async read views. Persistent
+# connections are not safe under ASGI, so they are closed after each
+# request there. The connection pool, DB_POOL=1, is opt-in until it has
+# been load tested against PostgreSQL.
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    export GUNICORN_WORKER_CLASS="${GUNICORN_WORKER_CLASS:-uvicorn}"
+    export ASYNC_VIEWS="${ASYNC_VIEWS:-1}"
+    export DB_CONN_MAX_AGE="${DB_CONN_MAX_AGE:-0}"
+fi
+
+# Workers, threads and timeouts come from GUNICORN_* variables, see
+# gunicorn.conf.py.
+gunicorn --config gunicorn.conf.py